@@ -1,39 +1,89 @@
-from flask import Flask, jsonify
-from flask_jwt_extended import JWTManager
-from dotenv import load_dotenv
-from core.db import init_db 
-import os
-
-# Load environment variables
-load_dotenv()
-
-# Initialize Flask app
-app = Flask(__name__)
-
-# Initialize MongoDB connection (uses .env MONGO_URI)
-mongo = init_db(app) 
-
-# JWT setup
-app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
-jwt = JWTManager(app)
-
-# Home route
-@app.route("/")
-def home():
-    return jsonify({"message": "Welcome to EventMate API"})
-
-# Import blueprints AFTER initializing app and DB
-from routes.events_routes import events_bp
-app.register_blueprint(events_bp, url_prefix="/events")
-
-from routes.auth_routes import auth_bp
-app.register_blueprint(auth_bp, url_prefix="/auth")
-
-from routes.reviews_routes import reviews_bp
-app.register_blueprint(reviews_bp, url_prefix="/reviews")
-
-from routes.bookings_routes import bookings_bp
-app.register_blueprint(bookings_bp, url_prefix="/bookings")
-
-if __name__ == "__main__":
-    app.run(debug=True, port=5001)
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager
+from dotenv import load_dotenv
+from core.db import init_db 
+from core.cli import register_commands
+from core.cache import cache
+from core.json_provider import MongoJSONProvider
+from core.ratings import start_reconciler
+from core.inventory import start_rebalancer
+from core.metrics import init_metrics, metrics
+from core.compression import init_compression
+from core.db_config import pool_stats
+from core.tokens import blocklist
+import os
+
+# Load environment variables
+load_dotenv()
+
+# Initialize Flask app
+app = Flask(__name__)
+
+# Initialize MongoDB connection (uses .env MONGO_URI)
+mongo = init_db(app) 
+
+# Serialize ObjectId/datetime/Decimal128 app-wide (replaces flask-pymongo's provider)
+app.json = MongoJSONProvider(app)
+
+# JWT setup
+app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
+jwt = JWTManager(app)
+
+# Logged-out tokens and tokens issued before a password change are rejected
+@jwt.token_in_blocklist_loader
+def token_revoked(jwt_header, jwt_payload):
+    return blocklist.is_revoked(jwt_payload)
+
+# Per-route latency, Mongo round trips and slow-request logging
+init_metrics(app)
+
+# gzip/br/zstd for large JSON bodies (after metrics, so sizes are on-the-wire)
+init_compression(app)
+
+# Management commands (flask --app app <command>)
+register_commands(app)
+
+# Optional periodic repair of rating aggregates
+if os.getenv("RATINGS_RECONCILE_INTERVAL"):
+    start_reconciler(app, lambda: mongo.db, float(os.getenv("RATINGS_RECONCILE_INTERVAL")))
+
+# Periodic seat shard rebalance / available_seats sync for sharded events
+if os.getenv("SEAT_REBALANCE_INTERVAL"):
+    start_rebalancer(app, lambda: mongo.db, float(os.getenv("SEAT_REBALANCE_INTERVAL")))
+
+# Home route
+@app.route("/")
+def home():
+    return jsonify({"message": "Welcome to EventMate API"})
+
+# Cache hit/miss/eviction counters
+@app.route("/cache/stats")
+def cache_stats():
+    return jsonify(cache.stats())
+
+# Prometheus scrape endpoint
+@app.route("/metrics")
+def metrics_endpoint():
+    return app.response_class(metrics.render(cache.stats(), pool_stats.totals()),
+                              mimetype="text/plain; version=0.0.4")
+
+# Connection pool counters per MongoDB server
+@app.route("/db/pool")
+def db_pool_stats():
+    return jsonify(pool_stats.snapshot())
+
+# Import blueprints AFTER initializing app and DB
+from routes.events_routes import events_bp
+app.register_blueprint(events_bp, url_prefix="/events")
+
+from routes.auth_routes import auth_bp
+app.register_blueprint(auth_bp, url_prefix="/auth")
+
+from routes.reviews_routes import reviews_bp
+app.register_blueprint(reviews_bp, url_prefix="/reviews")
+
+from routes.bookings_routes import bookings_bp
+app.register_blueprint(bookings_bp, url_prefix="/bookings")
+
+if __name__ == "__main__":
+    app.run(debug=True, port=5001)
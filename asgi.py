@@ -0,0 +1,57 @@
+"""Async (ASGI) deployment of the API: Quart + PyMongo's AsyncMongoClient.
+
+Serves the same events, bookings, reviews and auth routes as app.py with
+the shared logic in core/. Run with an ASGI server, e.g.
+
+    hypercorn asgi:app --bind 0.0.0.0:5002 --workers 2
+"""
+from quart import Quart, jsonify
+from dotenv import load_dotenv
+from core.async_db import amongo
+from core.cache import cache
+from core.compression import init_compression_async
+from core.json_provider import MongoJSONProvider
+import os
+
+# Load environment variables
+load_dotenv()
+
+# Initialize Quart app
+app = Quart(__name__)
+
+# Async MongoDB client, opened when the server starts (uses .env MONGO_URI)
+amongo.init_app(app)
+
+# Same JSON encoding for ObjectId/datetime/Decimal128 as the Flask app
+app.json = MongoJSONProvider(app)
+
+# Tokens are interchangeable with the Flask app's (same secret and format)
+app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
+
+# gzip/br/zstd for large JSON bodies
+init_compression_async(app)
+
+# Home route
+@app.route("/")
+async def home():
+    return jsonify({"message": "Welcome to EventMate API"})
+
+# Cache hit/miss/eviction counters
+@app.route("/cache/stats")
+async def cache_stats():
+    return jsonify(cache.stats())
+
+from async_routes.events_routes import events_bp
+app.register_blueprint(events_bp, url_prefix="/events")
+
+from async_routes.auth_routes import auth_bp
+app.register_blueprint(auth_bp, url_prefix="/auth")
+
+from async_routes.reviews_routes import reviews_bp
+app.register_blueprint(reviews_bp, url_prefix="/reviews")
+
+from async_routes.bookings_routes import bookings_bp
+app.register_blueprint(bookings_bp, url_prefix="/bookings")
+
+if __name__ == "__main__":
+    app.run(port=5002)
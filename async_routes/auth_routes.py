@@ -0,0 +1,55 @@
+from quart import Blueprint, request, jsonify, current_app
+from async_routes.security import jwt_required, get_jwt, get_jwt_identity
+from core import handlers
+from core.async_db import amongo
+from core.handlers import respond_async
+from core.ratelimit import client_ip
+from core.tokens import ACCESS_TOKEN_EXPIRES, blocklist, create_access_token, user_claims
+
+auth_bp = Blueprint('auth', __name__)
+
+
+def issue_token(identity, user):
+    return create_access_token(identity, current_app.config["JWT_SECRET_KEY"],
+                               expires_delta=ACCESS_TOKEN_EXPIRES, additional_claims=user_claims(user))
+
+
+# REGISTER USER
+@auth_bp.route('/register', methods=['POST'])
+async def register_user():
+    return await respond_async(handlers.register_user(amongo.db, request.get_json))
+
+
+# LOGIN USER
+@auth_bp.route('/login', methods=['POST'])
+async def login_user():
+    return await respond_async(handlers.login_user(amongo.db, request.get_json, client_ip(request), issue_token))
+
+
+# LOGOUT (revokes the presented token)
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+async def logout_user():
+    blocklist.revoke(get_jwt())
+    return jsonify({"message": "Logged out"}), 200
+
+
+# GET USER PROFILE
+@auth_bp.route('/profile', methods=['GET'])
+@jwt_required()
+async def get_profile():
+    return await respond_async(handlers.get_profile(amongo.db, get_jwt_identity()))
+
+
+# UPDATE USER PROFILE
+@auth_bp.route('/profile', methods=['PUT'])
+@jwt_required()
+async def update_profile():
+    return await respond_async(handlers.update_profile(amongo.db, get_jwt_identity(), request.get_json, issue_token))
+
+
+# DELETE USER PROFILE
+@auth_bp.route('/profile', methods=['DELETE'])
+@jwt_required()
+async def delete_profile():
+    return await respond_async(handlers.delete_profile(amongo.db, get_jwt_identity()))
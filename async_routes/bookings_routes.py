@@ -0,0 +1,65 @@
+from quart import Blueprint, request
+from async_routes.security import jwt_required, get_jwt_identity
+from core import handlers
+from core.async_db import amongo
+from core.handlers import respond_async
+from core.streaming import wants_stream
+from core.idempotency import idempotent_async
+import os
+
+bookings_bp = Blueprint("bookings", __name__)
+
+BULK_BOOKING_MAX = int(os.getenv("BULK_BOOKING_MAX", 500))
+
+# Writes sent with an Idempotency-Key replay their first response on retry
+idempotent_write = idempotent_async(lambda: amongo.db, get_jwt_identity)
+
+# GET ALL BOOKINGS
+@bookings_bp.route("/", methods=["GET"])
+@jwt_required()
+async def get_user_bookings():
+    return await respond_async(handlers.get_user_bookings(amongo.db, str(get_jwt_identity()), request.args,
+                                                          wants_stream(request)))
+
+
+# GET SINGLE BOOKING
+@bookings_bp.route("/<string:booking_id>", methods=["GET"])
+@jwt_required()
+async def get_booking(booking_id):
+    return await respond_async(handlers.get_booking(amongo.db, booking_id))
+
+
+#CREATE NEW BOOKING
+@bookings_bp.route("/", methods=["POST"])
+@jwt_required()
+@idempotent_write
+async def create_booking():
+    return await respond_async(handlers.create_booking(amongo.db, str(get_jwt_identity()), request.get_json))
+
+
+#CREATE MANY BOOKINGS
+# Reservations for different events are issued concurrently
+@bookings_bp.route("/bulk", methods=["POST"])
+@jwt_required()
+@idempotent_write
+async def create_bookings_bulk():
+    return await respond_async(handlers.create_bookings_bulk(amongo.db, str(get_jwt_identity()),
+                                                             request.get_json, BULK_BOOKING_MAX))
+
+
+#UPDATE BOOKING STATUS
+# pending -> confirmed -> cancelled; cancelling gives the seats back
+@bookings_bp.route("/<string:booking_id>", methods=["PUT"])
+@jwt_required()
+@idempotent_write
+async def update_booking(booking_id):
+    return await respond_async(handlers.update_booking(amongo.db, booking_id, str(get_jwt_identity()),
+                                                       request.get_json))
+
+
+# DELETE BOOKING
+@bookings_bp.route("/<string:booking_id>", methods=["DELETE"])
+@jwt_required()
+@idempotent_write
+async def delete_booking(booking_id):
+    return await respond_async(handlers.delete_booking(amongo.db, booking_id, str(get_jwt_identity())))
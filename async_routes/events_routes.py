@@ -0,0 +1,90 @@
+import asyncio
+from quart import Blueprint, request, current_app
+from async_routes.security import jwt_required
+from core import handlers
+from core.async_db import amongo
+from core.handlers import respond_async
+from core.streaming import wants_stream
+from core.stats import read_stats, summary_collection
+
+events_bp = Blueprint("events", __name__)
+
+# Route logic lives in core.handlers, shared with the Flask app
+
+# BASIC CRUD
+
+# Get all events (with pagination + sorting)
+@events_bp.route("/", methods=["GET"])
+async def get_events():
+    return await respond_async(handlers.get_events(amongo.read_db("events_read"), request.args))
+
+
+# Get a single event by ID
+@events_bp.route("/<string:event_id>", methods=["GET"])
+async def get_event(event_id):
+    return await respond_async(handlers.get_event(amongo.db, event_id, request))
+
+
+# Create new event (Admin only)
+@events_bp.route("/", methods=["POST"])
+@jwt_required()
+async def create_event():
+    return await respond_async(handlers.create_event(amongo.db, request.get_json))
+
+
+# Bulk import/upsert events
+# Body: JSON array or NDJSON, parsed chunk by chunk as it arrives
+@events_bp.route("/bulk", methods=["POST"])
+@jwt_required()
+async def bulk_import_events():
+    chunks = aiter(request.body)
+    return await respond_async(handlers.bulk_import_events(amongo.db, request.args, lambda: anext(chunks, b"")))
+
+
+# Update an event
+@events_bp.route("/<string:event_id>", methods=["PUT"])
+@jwt_required()
+async def update_event(event_id):
+    return await respond_async(handlers.update_event(amongo.db, event_id, request.get_json))
+
+
+# Delete an event
+@events_bp.route("/<string:event_id>", methods=["DELETE"])
+@jwt_required()
+async def delete_event(event_id):
+    return await respond_async(handlers.delete_event(amongo.db, event_id))
+
+
+#ADVANCED QUERIES
+
+# Search events (same parameters as the Flask app, including NDJSON streaming)
+@events_bp.route("/search", methods=["GET"])
+async def search_events():
+    return await respond_async(handlers.search_events(amongo.read_db("events_read"), request.args,
+                                                      wants_stream(request)))
+
+
+# Nearby events
+@events_bp.route("/nearby", methods=["GET"])
+async def nearby_events():
+    return await respond_async(handlers.nearby_events(amongo.read_db("events_read"), request.args))
+
+
+def _summary(dimension):
+    async def summary():
+        # Staleness check and refresh use the sync stats code off the event loop
+        await asyncio.to_thread(read_stats, amongo.sync_db(), dimension, logger=current_app.logger)
+        return summary_collection(amongo.read_db("stats_read"), dimension)
+    return summary
+
+
+# Aggregation: top categories (served from the stats_category summary)
+@events_bp.route("/stats/categories", methods=["GET"])
+async def category_stats():
+    return await respond_async(handlers.category_stats(_summary("category")))
+
+
+# Pre-aggregated stats by category, city, month, price_band or seats
+@events_bp.route("/stats/<string:dimension>", methods=["GET"])
+async def dimension_stats(dimension):
+    return await respond_async(handlers.dimension_stats(dimension, request.args, _summary(dimension)))
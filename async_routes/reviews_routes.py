@@ -0,0 +1,31 @@
+from quart import Blueprint, request
+from async_routes.security import jwt_required
+from core import handlers
+from core.async_db import amongo
+from core.handlers import respond_async
+
+# Create Blueprint
+reviews_bp = Blueprint('reviews', __name__)
+
+# Get reviews for a specific event, newest first
+@reviews_bp.route('/<string:event_id>', methods=['GET'])
+async def get_reviews(event_id):
+    return await respond_async(handlers.get_reviews(amongo.db, event_id, request))
+
+# Add a new review
+@reviews_bp.route('/<string:event_id>', methods=['POST'])
+@jwt_required()
+async def add_review(event_id):
+    return await respond_async(handlers.add_review(amongo.db, event_id, request.get_json))
+
+# Update review
+@reviews_bp.route('/<string:event_id>/<string:review_id>', methods=['PUT'])
+@jwt_required()
+async def update_review(event_id, review_id):
+    return await respond_async(handlers.update_review(amongo.db, event_id, review_id, request.get_json))
+
+# Delete review
+@reviews_bp.route('/<string:event_id>/<string:review_id>', methods=['DELETE'])
+@jwt_required()
+async def delete_review(event_id, review_id):
+    return await respond_async(handlers.delete_review(amongo.db, event_id, review_id))
@@ -0,0 +1,28 @@
+from functools import wraps
+from quart import current_app, g, jsonify, request
+from core.tokens import TokenError, blocklist, decode_access_token
+
+
+def jwt_required():
+    """Quart version of flask_jwt_extended.jwt_required (Bearer header only)."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            try:
+                g.jwt_claims = decode_access_token(request.headers.get("Authorization"),
+                                                   current_app.config["JWT_SECRET_KEY"])
+            except TokenError as e:
+                return jsonify({"msg": str(e)}), e.status
+            if blocklist.is_revoked(g.jwt_claims):
+                return jsonify({"msg": "Token has been revoked"}), 401
+            return await view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_jwt():
+    return g.jwt_claims
+
+
+def get_jwt_identity():
+    return g.jwt_claims["sub"]
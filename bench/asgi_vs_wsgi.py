@@ -0,0 +1,118 @@
+"""Side-by-side HTTP load test of the Flask (WSGI) and Quart (ASGI) apps.
+
+Start both against the same database first, e.g.
+
+    gunicorn -w 4 -b :5001 app:app
+    hypercorn -w 4 -b :5002 asgi:app
+
+then drive the same read mix at each with a pool of keep-alive clients:
+
+    python -m bench.asgi_vs_wsgi --wsgi http://localhost:5001 --asgi http://localhost:5002 \
+        --concurrency 128 --seconds 20
+"""
+import argparse, http.client, json, random, statistics, threading, time
+from urllib.parse import urlsplit
+
+# Route mix: (name, weight, path template)
+SCENARIOS = [
+    ("list", 4, "/events/?limit=20&view=card"),
+    ("event", 4, "/events/{event_id}"),
+    ("search", 2, "/events/search?category={category}&limit=20"),
+    ("reviews", 2, "/reviews/{event_id}"),
+    ("nearby", 1, "/events/nearby?lat=51.5&lon=-0.12&radius=50&view=card"),
+]
+
+
+def fetch_json(base, path):
+    url = urlsplit(base)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+    conn.request("GET", path)
+    body = conn.getresponse().read()
+    conn.close()
+    return json.loads(body)
+
+
+def sample_params(base, count=50):
+    events = fetch_json(base, f"/events/?limit={count}&fields=category")
+    if not events:
+        raise SystemExit("No events found; seed the database first.")
+    return [{"event_id": e["_id"], "category": e.get("category", "Music").split()[0]} for e in events]
+
+
+def worker(base, deadline, params, samples, errors, lock):
+    url = urlsplit(base)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+    names = [s[0] for s in SCENARIOS]
+    weights = [s[1] for s in SCENARIOS]
+    templates = {s[0]: s[2] for s in SCENARIOS}
+    local = {name: [] for name in names}
+    failed = 0
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights)[0]
+        path = templates[name].format(**random.choice(params))
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                failed += 1
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            conn.close()
+            conn = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+            continue
+        local[name].append((time.perf_counter() - started) * 1000)
+    conn.close()
+    with lock:
+        for name, values in local.items():
+            samples.setdefault(name, []).extend(values)
+        errors[0] += failed
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    return {"requests": len(samples), "p50_ms": round(statistics.median(samples), 2),
+            "p95_ms": round(pick(0.95), 2), "p99_ms": round(pick(0.99), 2)}
+
+
+def run(base, params, concurrency, seconds):
+    samples, errors, lock = {}, [0], threading.Lock()
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=worker, args=(base, deadline, params, samples, errors, lock))
+               for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    every = [ms for values in samples.values() for ms in values]
+    return {
+        "rps": round(len(every) / elapsed, 1),
+        "errors": errors[0],
+        "overall": summarize(every) if every else None,
+        "routes": {name: summarize(values) for name, values in sorted(samples.items()) if values},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wsgi", default="http://localhost:5001")
+    parser.add_argument("--asgi", default="http://localhost:5002")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--warmup", type=float, default=3)
+    args = parser.parse_args()
+
+    params = sample_params(args.wsgi)
+    results = {}
+    for label, base in (("wsgi", args.wsgi), ("asgi", args.asgi)):
+        run(base, params, args.concurrency, args.warmup)
+        results[label] = run(base, params, args.concurrency, args.seconds)
+    print(json.dumps({"concurrency": args.concurrency, "seconds": args.seconds, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
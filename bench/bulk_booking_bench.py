@@ -0,0 +1,77 @@
+"""Single vs bulk booking throughput.
+
+Books the same N (event, ticket_count) items once through book_seats (the
+POST /bookings/ path, two round trips per booking) and once through
+book_many in request-sized chunks (the POST /bookings/bulk path).
+
+    python -m bench.bulk_booking_bench --items 2000 --chunk 200
+"""
+import argparse, json, random, time
+from datetime import datetime
+from bson import ObjectId
+from dotenv import load_dotenv
+from core.db_config import make_client
+from core.indexes import apply_indexes
+from core.flow import run
+from core.reservations import book_seats, book_many, ReservationError
+
+load_dotenv()
+
+
+def make_items(event_ids, count):
+    user_id = ObjectId()
+    # One booking per event, as a partner integration would send
+    return [{
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "event_id": event_id,
+        "ticket_count": random.randint(1, 4),
+        "status": "confirmed",
+        "created_at": datetime.utcnow(),
+    } for event_id in random.sample(event_ids, count)]
+
+
+def reset(db, events):
+    db.events.drop()
+    db.bookings.drop()
+    apply_indexes(db)
+    return db.events.insert_many([{"name": f"Bench {i}", "available_seats": 1000} for i in range(events)]).inserted_ids
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--chunk", type=int, default=200, help="items per bulk request")
+    parser.add_argument("--db", default="eventmate_bench")
+    args = parser.parse_args()
+
+    client = make_client()
+    db = client[args.db]
+    report = {"items": args.items, "chunk": args.chunk}
+
+    event_ids = reset(db, args.items)
+    items = make_items(event_ids, args.items)
+    started = time.perf_counter()
+    for booking in items:
+        try:
+            run(book_seats(db, booking))
+        except ReservationError:
+            pass
+    elapsed = time.perf_counter() - started
+    report["single"] = {"seconds": round(elapsed, 3), "bookings_per_sec": round(args.items / elapsed)}
+
+    event_ids = reset(db, args.items)
+    items = make_items(event_ids, args.items)
+    started = time.perf_counter()
+    for i in range(0, len(items), args.chunk):
+        run(book_many(db, items[i:i + args.chunk]))
+    elapsed = time.perf_counter() - started
+    report["bulk"] = {"seconds": round(elapsed, 3), "bookings_per_sec": round(args.items / elapsed)}
+
+    report["speedup"] = round(report["bulk"]["bookings_per_sec"] / report["single"]["bookings_per_sec"], 2)
+    print(json.dumps(report, indent=2))
+    client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
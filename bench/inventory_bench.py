@@ -0,0 +1,95 @@
+"""Booking throughput on one hot event with and without seat sharding.
+
+For each mode a fresh event gets --seats seats and --threads workers book
+1-3 tickets each through core.reservations until --requests attempts are
+done. "unsharded" is the single available_seats counter; the numbers are
+seat shard counts (core.inventory). Each run also checks that nothing was
+oversold and that available_seats matches after a rebalance.
+
+    python -m bench.inventory_bench --shards 1,8,32 --seats 50000 --requests 20000 --threads 64
+"""
+import argparse, json, random, statistics, time
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from dotenv import load_dotenv
+from core.db_config import make_client
+from core.indexes import apply_indexes
+from core.inventory import enable_sharding, rebalance
+from core import flow
+from core.reservations import book_seats, ReservationError
+
+load_dotenv()
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    return {"p50_ms": round(statistics.median(samples), 2), "p95_ms": round(pick(0.95), 2),
+            "p99_ms": round(pick(0.99), 2)}
+
+
+def run(db, shards, args):
+    event_id = db.events.insert_one({"name": "Flash sale", "available_seats": args.seats}).inserted_id
+    if shards:
+        enable_sharding(db, event_id, shards)
+
+    def attempt(_):
+        booking = {"user_id": ObjectId(), "event_id": event_id, "ticket_count": random.randint(1, 3),
+                   "status": "confirmed"}
+        started = time.perf_counter()
+        try:
+            flow.run(book_seats(db, booking))
+            outcome = "booked"
+        except ReservationError as e:
+            outcome = str(e)
+        return outcome, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(attempt, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    booked = [ms for outcome, ms in results if outcome == "booked"]
+    sold = sum(b["ticket_count"] for b in db.bookings.find({"event_id": event_id}, {"ticket_count": 1}))
+    if shards:
+        rebalance(db, event_id, shards)
+    remaining = db.events.find_one({"_id": event_id})["available_seats"]
+    return {
+        "requests": len(results),
+        "booked": len(booked),
+        "rejected": len(results) - len(booked),
+        "rps": round(len(results) / elapsed, 1),
+        "bookings_per_sec": round(len(booked) / elapsed, 1),
+        **(summarize(booked) if booked else {}),
+        "sold": sold,
+        "remaining": remaining,
+        "consistent": sold <= args.seats and remaining == args.seats - sold,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shards", default="1,8,32", help="comma-separated shard counts to compare")
+    parser.add_argument("--seats", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--db", default="eventmate_bench")
+    args = parser.parse_args()
+
+    client = make_client(maxPoolSize=args.threads)
+    db = client[args.db]
+    for name in ("events", "bookings", "seat_shards"):
+        db[name].drop()
+    apply_indexes(db)
+
+    modes = {"unsharded": run(db, 0, args)}
+    for shards in (int(n) for n in args.shards.split(",")):
+        modes[f"{shards}_shards"] = run(db, shards, args)
+
+    print(json.dumps({"seats": args.seats, "threads": args.threads, **modes}, indent=2))
+    client.drop_database(args.db)
+    raise SystemExit(0 if all(m["consistent"] for m in modes.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
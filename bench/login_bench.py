@@ -0,0 +1,116 @@
+"""Login latency under a burst of real logins mixed with a credential-stuffing flood.
+
+Runs the Flask app in-process against a scratch database, once with the login
+rate limiter off and once with it on, and reports p50/p95/p99 for legitimate
+logins, status counts for both sides and how many password hashes were spent:
+
+    python -m bench.login_bench --logins 400 --attempts 2000 --threads 32
+
+PASSWORD_HASH_METHOD / PASSWORD_HASH_WORKERS / LOGIN_* settings are read from
+the environment as usual, so the same script compares hash parameters too.
+"""
+import argparse, json, os, random, statistics, threading, time
+from collections import Counter
+from urllib.parse import urlsplit, urlunsplit
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PASSWORD = "Password123"
+
+
+def scratch_uri(db_name):
+    url = urlsplit(os.getenv("MONGO_URI", "mongodb://localhost:27017/"))
+    return urlunsplit((url.scheme, url.netloc, "/" + db_name, url.query, url.fragment))
+
+
+def summarize(samples):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    return {"requests": len(samples), "p50_ms": round(statistics.median(samples), 2),
+            "p95_ms": round(pick(0.95), 2), "p99_ms": round(pick(0.99), 2)}
+
+
+def run(app, jobs, threads):
+    """Run (kind, username, password, ip) jobs across threads; collect latencies and statuses."""
+    import core.passwords as passwords
+    queue, lock = list(jobs), threading.Lock()
+    latencies, statuses = {"legit": [], "attack": []}, {"legit": Counter(), "attack": Counter()}
+    hashes_before = passwords.hashes_computed
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                if not queue:
+                    return
+                kind, username, password, ip = queue.pop()
+            started = time.perf_counter()
+            response = client.post("/auth/login", json={"username": username, "password": password},
+                                   environ_base={"REMOTE_ADDR": ip})
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies[kind].append(elapsed)
+                statuses[kind][response.status_code] += 1
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return {
+        "seconds": round(time.perf_counter() - started, 2),
+        "hashes_computed": passwords.hashes_computed - hashes_before,
+        "legit": {**(summarize(latencies["legit"]) or {}), "status": dict(statuses["legit"])},
+        "attack": {"requests": len(latencies["attack"]), "status": dict(statuses["attack"])},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--logins", type=int, default=400, help="legitimate logins")
+    parser.add_argument("--attempts", type=int, default=2000, help="wrong-password attempts")
+    parser.add_argument("--victims", type=int, default=5, help="usernames the attacker targets")
+    parser.add_argument("--attacker-ips", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--db", default="eventmate_bench")
+    args = parser.parse_args()
+
+    # Point the app at the scratch database before it connects
+    os.environ["MONGO_URI"] = scratch_uri(args.db)
+    os.environ["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY") or "bench-secret-" + "x" * 32
+    from app import app
+    from core.db import mongo
+    from core.passwords import HASH_METHOD, HASH_WORKERS, hash_password
+    from core.ratelimit import login_limiter
+
+    db = mongo.db
+    db.users.drop()
+    stored = hash_password(PASSWORD)  # same password for everyone, hashed once
+    usernames = [f"bench{i}" for i in range(args.users)]
+    db.users.insert_many([{"username": name, "password": stored} for name in usernames])
+
+    rng = random.Random(7)
+    victims = usernames[:args.victims]
+    jobs = [("legit", rng.choice(usernames), PASSWORD, f"10.0.{i // 250}.{i % 250}")
+            for i in range(args.logins)]
+    jobs += [("attack", rng.choice(victims), f"guess{i}", f"203.0.113.{rng.randrange(args.attacker_ips)}")
+             for i in range(args.attempts)]
+    rng.shuffle(jobs)
+
+    results = {}
+    for label, enabled in (("no_limiter", False), ("limiter", True)):
+        login_limiter.reset()
+        login_limiter.enabled = enabled
+        results[label] = run(app, jobs, args.threads)
+    print(json.dumps({"hash_method": HASH_METHOD, "hash_workers": HASH_WORKERS,
+                      "threads": args.threads, **results}, indent=2))
+    db.users.drop()
+
+
+if __name__ == "__main__":
+    main()
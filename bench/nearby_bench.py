@@ -0,0 +1,118 @@
+"""Compare /events/nearby query paths on geo-distributed synthetic events.
+
+Loads N events (default 1M) scattered around the seed CITIES into a scratch
+database, then times, for the same query points:
+
+- near:     the old unbounded $near find (every event in the radius)
+- geonear:  the $geoNear pipeline from core.queries.nearby_search
+- page2:    the second page of the same query via its cursor
+- cached:   geonear through the cache, keyed by geohash cell when
+            NEARBY_GEOHASH_PRECISION is set (as the routes do)
+
+    python -m bench.nearby_bench --events 1000000 --queries 200 --radius 5
+"""
+import argparse, json, random, statistics, time
+from pymongo import InsertOne
+from dotenv import load_dotenv
+from core.cache import LRUCache
+from core.db_config import make_client
+from core.indexes import apply_indexes
+from core.queries import nearby_search, nearby_body
+from core.search import search_fields
+from seed.make_events import make_event, CITIES
+
+load_dotenv()
+
+
+def load_events(db, count, spread, batch_size=10000):
+    db.events.drop()
+    started = time.perf_counter()
+    batch = []
+    for n in range(1, count + 1):
+        event = make_event(n)
+        event.pop("reviews", None)
+        # Seeded events sit exactly on their city; scatter them around it
+        lon, lat = CITIES[event["city"]]
+        event["location"]["coordinates"] = [round(random.gauss(lon, spread), 5), round(random.gauss(lat, spread), 5)]
+        event["search"] = search_fields(event)
+        batch.append(InsertOne(event))
+        if len(batch) >= batch_size:
+            db.events.bulk_write(batch, ordered=False)
+            batch = []
+    if batch:
+        db.events.bulk_write(batch, ordered=False)
+    print(f"loaded {count} events in {time.perf_counter() - started:.1f}s")
+    started = time.perf_counter()
+    apply_indexes(db)
+    print(f"built indexes in {time.perf_counter() - started:.1f}s")
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    return {"p50_ms": round(statistics.median(samples), 2), "p95_ms": round(pick(0.95), 2),
+            "p99_ms": round(pick(0.99), 2), "mean_ms": round(statistics.mean(samples), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius", type=float, default=5, help="km")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--spread", type=float, default=0.15, help="std-dev of event coordinates around a city, degrees")
+    parser.add_argument("--db", default="eventmate_bench")
+    parser.add_argument("--keep", action="store_true", help="reuse an already loaded scratch database")
+    args = parser.parse_args()
+
+    client = make_client()
+    db = client[args.db]
+    if not args.keep or db.events.estimated_document_count() == 0:
+        load_events(db, args.events, args.spread)
+
+    cache = LRUCache(maxsize=10000, ttl=3600)
+    cities = list(CITIES.values())
+    results = {"near": [], "geonear": [], "page2": [], "cached": []}
+    near_rows = []
+    for _ in range(args.queries):
+        lon, lat = random.choice(cities)
+        lat, lon = random.gauss(lat, 0.02), random.gauss(lon, 0.02)
+        params = {"lat": str(lat), "lon": str(lon), "radius": str(args.radius),
+                  "limit": str(args.limit), "view": "card", "cursor": ""}
+        nearby = nearby_search(params)
+
+        near = {"location": {"$near": {"$geometry": {"type": "Point", "coordinates": [lon, lat]},
+                                       "$maxDistance": args.radius * 1000}}}
+        ms, rows = timed(lambda: list(db.events.find(near, {"search": 0})))
+        results["near"].append(ms)
+        near_rows.append(len(rows))
+
+        ms, rows = timed(lambda: list(db.events.aggregate(nearby.pipeline)))
+        results["geonear"].append(ms)
+        next_cursor = nearby_body(nearby, rows)["next_cursor"]
+        if next_cursor:
+            page2 = nearby_search({**params, "cursor": next_cursor})
+            results["page2"].append(timed(lambda: list(db.events.aggregate(page2.pipeline)))[0])
+
+        load = lambda: list(db.events.aggregate(nearby.pipeline))
+        results["cached"].append(timed(lambda: cache.get_or_load(nearby.cache_key or repr(params), load))[0])
+
+    print(json.dumps({
+        "events": db.events.estimated_document_count(),
+        "radius_km": args.radius,
+        "near_rows_mean": round(statistics.mean(near_rows), 1),
+        "cache": cache.stats(),
+        **{mode: summarize(samples) for mode, samples in results.items() if samples},
+    }, indent=2))
+    if not args.keep:
+        client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Concurrent oversell check for the seat reservation engine.
+
+Hammers a single event from many threads through core.reservations and
+verifies that confirmed tickets never exceed capacity and that the event's
+available_seats matches what was sold.
+
+    python -m bench.reservation_load --seats 500 --requests 5000 --threads 64
+"""
+import argparse, random, time
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from dotenv import load_dotenv
+from core.db_config import make_client
+from core.indexes import apply_indexes
+from core.flow import run
+from core.reservations import book_seats, ReservationError
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seats", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--users", type=int, default=2000, help="distinct users (fewer users -> more duplicates)")
+    parser.add_argument("--db", default="eventmate_bench")
+    args = parser.parse_args()
+
+    client = make_client(maxPoolSize=args.threads)
+    db = client[args.db]
+    db.events.drop()
+    db.bookings.drop()
+    apply_indexes(db)
+
+    event_id = db.events.insert_one({"name": "Load test", "available_seats": args.seats}).inserted_id
+    users = [ObjectId() for _ in range(args.users)]
+
+    def attempt(_):
+        booking = {
+            "user_id": random.choice(users),
+            "event_id": event_id,
+            "ticket_count": random.randint(1, 3),
+            "status": "confirmed",
+        }
+        try:
+            run(book_seats(db, booking))
+            return "booked"
+        except ReservationError as e:
+            return str(e)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        outcomes = list(pool.map(attempt, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    sold = sum(b["ticket_count"] for b in db.bookings.find({"event_id": event_id, "status": "confirmed"}))
+    remaining = db.events.find_one({"_id": event_id})["available_seats"]
+    duplicates = db.bookings.aggregate([
+        {"$match": {"event_id": event_id, "status": "confirmed"}},
+        {"$group": {"_id": "$user_id", "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}},
+    ])
+
+    print(f"{args.requests} requests in {elapsed:.2f}s ({args.requests / elapsed:.0f} req/s)")
+    for outcome in sorted(set(outcomes)):
+        print(f"  {outcome}: {outcomes.count(outcome)}")
+    print(f"seats={args.seats} sold={sold} remaining={remaining}")
+
+    ok = sold <= args.seats and remaining == args.seats - sold and remaining >= 0 and not list(duplicates)
+    print("PASS: no oversell" if ok else "FAIL: inventory mismatch")
+    client.drop_database(args.db)
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
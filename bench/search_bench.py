@@ -0,0 +1,89 @@
+"""Compare /events/search query paths on a large synthetic catalogue.
+
+Loads N generated events (default 1M) into a scratch database, then times
+the legacy unanchored $regex filters against the indexed prefix fields and
+the $text index for the same inputs.
+
+    python -m bench.search_bench --events 1000000 --queries 200
+"""
+import argparse, json, random, statistics, time
+from pymongo import InsertOne
+from dotenv import load_dotenv
+from core.db_config import make_client
+from core.indexes import apply_indexes
+from core.search import search_fields, prefix_filter, regex_filter, text_filter, TEXT_SCORE
+from seed.make_events import make_event, CITIES, CATEGORIES
+
+load_dotenv()
+
+PAGE = 20
+
+
+def load_events(db, count, batch_size=10000):
+    db.events.drop()
+    started = time.perf_counter()
+    batch = []
+    for n in range(1, count + 1):
+        event = make_event(n)
+        event.pop("reviews", None)
+        event["description"] = f"{event['category']} in {event['city']} " + " ".join(event["tags"])
+        event["search"] = search_fields(event)
+        batch.append(InsertOne(event))
+        if len(batch) >= batch_size:
+            db.events.bulk_write(batch, ordered=False)
+            batch = []
+    if batch:
+        db.events.bulk_write(batch, ordered=False)
+    print(f"loaded {count} events in {time.perf_counter() - started:.1f}s")
+    started = time.perf_counter()
+    apply_indexes(db)
+    print(f"built indexes in {time.perf_counter() - started:.1f}s")
+
+
+def timed(db, query, projection=None, sort=None):
+    started = time.perf_counter()
+    cursor = db.events.find(query, projection).limit(PAGE)
+    if sort:
+        cursor = cursor.sort(sort)
+    list(cursor)
+    return (time.perf_counter() - started) * 1000
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    return {"p50_ms": round(statistics.median(samples), 2), "p95_ms": round(pick(0.95), 2),
+            "p99_ms": round(pick(0.99), 2), "mean_ms": round(statistics.mean(samples), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--db", default="eventmate_bench")
+    parser.add_argument("--keep", action="store_true", help="reuse an already loaded scratch database")
+    args = parser.parse_args()
+
+    client = make_client()
+    db = client[args.db]
+    if not args.keep or db.events.estimated_document_count() == 0:
+        load_events(db, args.events)
+
+    cities, categories = list(CITIES), list(CATEGORIES)
+    results = {"regex": [], "prefix": [], "text": []}
+    for _ in range(args.queries):
+        city = random.choice(cities)[:random.randint(3, 6)]
+        category = random.choice(categories)
+        results["regex"].append(timed(db, {**regex_filter("city", city), **regex_filter("category", category)}))
+        results["prefix"].append(timed(db, {**prefix_filter("city", city), **prefix_filter("category", category)}))
+        results["text"].append(timed(db, text_filter(category.split()[0]), {"score": TEXT_SCORE},
+                                     [("score", TEXT_SCORE)]))
+
+    print(json.dumps({"events": db.events.estimated_document_count(),
+                      **{mode: summarize(samples) for mode, samples in results.items()}}, indent=2))
+    if not args.keep:
+        client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
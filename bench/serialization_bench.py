@@ -0,0 +1,79 @@
+"""Serialization throughput for a 10k-document list response.
+
+Compares the old path (per-document ObjectId/datetime conversion loop, then
+Flask's default JSON provider) with MongoJSONProvider on the stdlib and
+orjson back ends. No database needed.
+
+    python -m bench.serialization_bench --docs 10000 --rounds 20
+"""
+import argparse, copy, json, random, time
+from datetime import datetime
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from core.json_provider import MongoJSONProvider, orjson
+
+
+def make_bookings(count):
+    return [{
+        "_id": ObjectId(),
+        "user_id": ObjectId(),
+        "event_id": ObjectId(),
+        "ticket_count": random.randint(1, 5),
+        "status": random.choice(["confirmed", "cancelled", "pending"]),
+        "created_at": datetime.utcnow(),
+    } for _ in range(count)]
+
+
+def legacy(app, docs):
+    # What the blueprints used to do before jsonify
+    for b in docs:
+        b["_id"] = str(b["_id"])
+        if isinstance(b.get("event_id"), ObjectId):
+            b["event_id"] = str(b["event_id"])
+        if isinstance(b.get("user_id"), ObjectId):
+            b["user_id"] = str(b["user_id"])
+        if isinstance(b.get("created_at"), datetime):
+            b["created_at"] = b["created_at"].isoformat()
+    return app.json.response(docs).get_data()
+
+
+def provider(app, docs):
+    return app.json.response(docs).get_data()
+
+
+def bench(name, app, fn, docs, rounds):
+    samples = []
+    for _ in range(rounds):
+        batch = copy.deepcopy(docs)
+        started = time.perf_counter()
+        body = fn(app, batch)
+        samples.append(time.perf_counter() - started)
+    best = min(samples)
+    print(json.dumps({"path": name, "docs": len(docs), "best_ms": round(best * 1000, 2),
+                      "docs_per_sec": round(len(docs) / best), "bytes": len(body)}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    docs = make_bookings(args.docs)
+
+    app = Flask(__name__)
+    with app.app_context():
+        app.json = DefaultJSONProvider(app)
+        bench("loop+default", app, legacy, docs, args.rounds)
+
+        app.json = MongoJSONProvider(app)
+        app.json.use_orjson = False
+        bench("provider-stdlib", app, provider, docs, args.rounds)
+
+        if orjson is not None:
+            app.json.use_orjson = True
+            bench("provider-orjson", app, provider, docs, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""Latency/throughput benchmark for every API route, with baseline comparison.
+
+Seeds a scratch database with the seed/ generators, then drives each route
+in turn at a fixed concurrency and prints machine-readable JSON (requests,
+rps, status counts, p50/p95/p99, response bytes and CPU per request per route).
+
+    python -m bench.suite --events 20000 --concurrency 16 --seconds 10 --out bench.json
+    python -m bench.suite ... --save-baseline bench/baseline.json   # record
+    python -m bench.suite ... --baseline bench/baseline.json        # compare, exit 1 on regression
+
+By default the Flask app runs in-process against MONGO_URI's server using
+the --db scratch database. --mongomock swaps in an in-process stand-in (no
+server needed; $geoNear and $merge are not supported there, so nearby and
+stats report errors). --url drives an already running server instead; start
+it with MONGO_URI pointing at the same --db and LOGIN_RATE_LIMIT=0.
+
+--accept-encoding "zstd, br, gzip" sends that header with every request so
+the compressed sizes and the compression CPU show up in the results. CPU is
+this process's CPU time, i.e. client and server in-process but only the
+client with --url.
+"""
+import argparse, http.client, importlib, json, os, random, statistics, sys, threading, time
+from collections import Counter
+from urllib.parse import urlsplit, urlunsplit
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PASSWORD = "Password123"
+TOKEN_USERS = 20
+
+# (name, method, path, authenticated); paths are filled from the seeded data
+SCENARIOS = [
+    ("events_list", "GET", "/events/?limit=20&view=card", False),
+    ("events_cursor", "GET", "/events/?limit=20&sort=price&cursor=", False),
+    ("event_get", "GET", "/events/{event_id}", False),
+    ("search_prefix", "GET", "/events/search?category={category}&limit=20", False),
+    ("search_text", "GET", "/events/search?q={word}&limit=20", False),
+    ("nearby", "GET", "/events/nearby?lat={lat}&lon={lon}&radius=5&limit=20&view=card", False),
+    ("stats_city", "GET", "/events/stats/city", False),
+    ("reviews", "GET", "/reviews/{event_id}", False),
+    ("bookings_list", "GET", "/bookings/", True),
+    ("booking_create", "POST", "/bookings/", True),
+    ("login", "POST", "/auth/login", False),
+]
+
+
+def scratch_uri(db_name):
+    url = urlsplit(os.getenv("MONGO_URI", "mongodb://localhost:27017/"))
+    return urlunsplit((url.scheme, url.netloc, "/" + db_name, url.query, url.fragment))
+
+
+def seed(db, events, users, bookings, batch_size=5000):
+    """Load events (with their seeded reviews), users and bookings."""
+    from bson import ObjectId
+    from datetime import datetime
+    from core.importer import normalize_event
+    from core.indexes import apply_indexes
+    from core.passwords import hash_password
+    from seed.make_events import make_event
+
+    started = time.perf_counter()
+    for name in ("events", "reviews", "users", "bookings"):
+        db[name].drop()
+    batch, reviews = [], []
+    for n in range(1, events + 1):
+        raw = make_event(n)
+        event = normalize_event(raw)
+        event["_id"] = ObjectId()
+        # Reviews go to their own collection with the aggregates the review
+        # routes would have maintained
+        ratings = [review["rating"] for review in raw["reviews"]]
+        event.update(review_count=len(ratings), rating_sum=sum(ratings),
+                     rating_hist={str(r): ratings.count(r) for r in set(ratings)},
+                     avg_rating=sum(ratings) / len(ratings) if ratings else None)
+        reviews += [dict(review, event_id=event["_id"]) for review in raw["reviews"]]
+        batch.append(event)
+        if len(batch) >= batch_size:
+            db.events.insert_many(batch, ordered=False)
+            db.reviews.insert_many(reviews, ordered=False)
+            batch, reviews = [], []
+    if batch:
+        db.events.insert_many(batch, ordered=False)
+    if reviews:
+        db.reviews.insert_many(reviews, ordered=False)
+
+    stored = hash_password(PASSWORD)
+    user_ids = db.users.insert_many(
+        [{"username": f"bench{i}", "password": stored, "role": "user"} for i in range(users)]).inserted_ids
+    event_ids = [e["_id"] for e in db.events.find({}, {"_id": 1})]
+    pairs = {(random.choice(user_ids), random.choice(event_ids)) for _ in range(bookings)}
+    docs = [{"user_id": u, "event_id": e, "ticket_count": random.randint(1, 4),
+             "status": random.choice(["confirmed", "cancelled", "pending"]), "created_at": datetime.utcnow()}
+            for u, e in pairs]
+    for start in range(0, len(docs), batch_size):
+        db.bookings.insert_many(docs[start:start + batch_size], ordered=False)
+    apply_indexes(db)
+    return round(time.perf_counter() - started, 1)
+
+
+def inprocess_transport(app):
+    def session():
+        client = app.test_client()
+
+        def send(method, path, body=None, headers=None):
+            response = client.open(path, method=method, json=body, headers=headers)
+            return response.status_code, response.data
+        return send
+    return session
+
+
+def http_transport(base):
+    url = urlsplit(base)
+
+    def session():
+        conn = [http.client.HTTPConnection(url.hostname, url.port, timeout=30)]
+
+        def send(method, path, body=None, headers=None):
+            headers = dict(headers or {})
+            payload = None
+            if body is not None:
+                payload = json.dumps(body)
+                headers["Content-Type"] = "application/json"
+            try:
+                conn[0].request(method, path, payload, headers)
+                response = conn[0].getresponse()
+                return response.status, response.read()
+            except (OSError, http.client.HTTPException):
+                conn[0].close()
+                conn[0] = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+                raise
+        return send
+    return session
+
+
+def build_request(scenario, data, rng):
+    """(path, body, headers) for one request of a scenario."""
+    from seed.make_events import CITIES, CATEGORIES
+    name, method, template, authenticated = scenario
+    category = rng.choice(list(CATEGORIES))
+    lon, lat = rng.choice(list(CITIES.values()))
+    path = template.format(event_id=rng.choice(data["event_ids"]), category=category.split()[0].lower(),
+                           word=rng.choice(CATEGORIES[category]).split()[0],
+                           lat=round(rng.gauss(lat, 0.02), 5), lon=round(rng.gauss(lon, 0.02), 5))
+    body, headers = None, None
+    if authenticated:
+        headers = {"Authorization": "Bearer " + rng.choice(data["tokens"])}
+    if name == "booking_create":
+        body = {"event_id": rng.choice(data["event_ids"]), "ticket_count": 1}
+    elif name == "login":
+        body = {"username": f"bench{rng.randrange(data['users'])}", "password": PASSWORD}
+    return path, body, headers
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    return {"p50_ms": round(statistics.median(samples), 2), "p95_ms": round(pick(0.95), 2),
+            "p99_ms": round(pick(0.99), 2)}
+
+
+def run_scenario(session, scenario, data, concurrency, seconds, seed_value, accept_encoding=None):
+    samples, statuses, sizes, lock = [], Counter(), [0], threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        rng = random.Random(seed_value * 1000 + index)
+        send = session()
+        local, local_statuses, local_bytes = [], Counter(), 0
+        while time.perf_counter() < deadline:
+            path, body, headers = build_request(scenario, data, rng)
+            if accept_encoding:
+                headers = dict(headers or {}, **{"Accept-Encoding": accept_encoding})
+            started = time.perf_counter()
+            try:
+                status, payload = send(scenario[1], path, body, headers)
+            except Exception:
+                local_statuses["exception"] += 1
+                continue
+            local.append((time.perf_counter() - started) * 1000)
+            local_statuses[status] += 1
+            local_bytes += len(payload)
+        with lock:
+            samples.extend(local)
+            statuses.update(local_statuses)
+            sizes[0] += local_bytes
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+    errors = sum(n for status, n in statuses.items() if status == "exception" or status >= 500)
+    result = {"requests": len(samples), "rps": round(len(samples) / elapsed, 1), "errors": errors,
+              "status": {str(status): n for status, n in sorted(statuses.items(), key=str)}}
+    if samples:
+        result.update(summarize(samples))
+        result.update(bytes_per_request=round(sizes[0] / len(samples)),
+                      cpu_ms_per_request=round(cpu * 1000 / len(samples), 3))
+    return result
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Per-route change vs. a baseline run; a route regresses if p95 or rps
+    moves by more than `tolerance` the wrong way, or it starts failing.
+    p95 changes under `min_delta_ms` are treated as noise."""
+    comparison = {}
+    for name, current in results["routes"].items():
+        before = baseline.get("routes", {}).get(name)
+        if not before or "p95_ms" not in before or "p95_ms" not in current:
+            continue
+        p95_change = (current["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0
+        rps_change = (current["rps"] - before["rps"]) / before["rps"] if before["rps"] else 0
+        comparison[name] = {
+            "p95_change_pct": round(p95_change * 100, 1),
+            "rps_change_pct": round(rps_change * 100, 1),
+            "regressed": (p95_change > tolerance and current["p95_ms"] - before["p95_ms"] > min_delta_ms)
+                         or rps_change < -tolerance
+                         or (current["errors"] > 0 and before["errors"] == 0),
+        }
+        if before.get("bytes_per_request"):
+            comparison[name]["bytes_change_pct"] = round(
+                (current["bytes_per_request"] - before["bytes_per_request"]) / before["bytes_per_request"] * 100, 1)
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10, help="measured time per route")
+    parser.add_argument("--warmup", type=float, default=2, help="unmeasured time per route")
+    parser.add_argument("--routes", help="comma-separated subset of: " + ",".join(s[0] for s in SCENARIOS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", default="eventmate_bench")
+    parser.add_argument("--keep", action="store_true", help="reuse an already seeded scratch database")
+    parser.add_argument("--mongomock", action="store_true", help="run against an in-process stand-in")
+    parser.add_argument("--url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--out", help="also write the results JSON here")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", help="write the results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95/rps change before a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=2, help="ignore p95 changes smaller than this")
+    parser.add_argument("--accept-encoding", help='Accept-Encoding to send, e.g. "zstd, br, gzip"')
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    os.environ["MONGO_URI"] = scratch_uri(args.db)
+    os.environ["MONGO_ENSURE_INDEXES"] = "0"
+    os.environ["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY") or "bench-secret-" + "x" * 32
+    if args.mongomock:
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("--mongomock needs the 'mongomock' package")
+        from core.db import mongo
+        # Let app.py run mongo.init_app first so the mock below is not replaced
+        importlib.import_module("app")
+        mongo.cx = mongomock.MongoClient()
+        mongo.db = mongo.cx[args.db]
+        db = mongo.db
+    else:
+        from core.db_config import make_client
+        db = make_client()[args.db]
+
+    seeded = None
+    if not args.keep or db.events.estimated_document_count() == 0:
+        seeded = seed(db, args.events, args.users, args.bookings)
+
+    if args.url:
+        session, transport = http_transport(args.url), args.url
+    else:
+        from app import app
+        from core.ratelimit import login_limiter
+        # Measure hashing, not throttling (bench.login_bench covers the limiter)
+        login_limiter.enabled = False
+        session, transport = inprocess_transport(app), "inprocess"
+
+    users = db.users.count_documents({})
+    send = session()
+    tokens = []
+    for i in range(min(TOKEN_USERS, users)):
+        status, body = send("POST", "/auth/login", {"username": f"bench{i}", "password": PASSWORD})
+        if status != 200:
+            raise SystemExit(f"Login for bench{i} failed with {status}: {body[:200]!r}")
+        tokens.append(json.loads(body)["token"])
+    data = {"event_ids": [str(e["_id"]) for e in db.events.find({}, {"_id": 1})], "tokens": tokens, "users": users}
+
+    selected = set(args.routes.split(",")) if args.routes else None
+    routes = {}
+    for scenario in SCENARIOS:
+        if selected and scenario[0] not in selected:
+            continue
+        if args.warmup:
+            run_scenario(session, scenario, data, args.concurrency, args.warmup, args.seed, args.accept_encoding)
+        routes[scenario[0]] = run_scenario(session, scenario, data, args.concurrency, args.seconds, args.seed,
+                                           args.accept_encoding)
+
+    results = {
+        "meta": {"transport": transport, "backend": "mongomock" if args.mongomock else "mongodb",
+                 "events": db.events.estimated_document_count(), "users": users,
+                 "bookings": db.bookings.estimated_document_count(), "seed_seconds": seeded,
+                 "concurrency": args.concurrency, "seconds": args.seconds, "python": sys.version.split()[0],
+                 "accept_encoding": args.accept_encoding},
+        "routes": routes,
+    }
+    if not args.url:
+        from core.compression import compression_stats
+        results["compression"] = compression_stats.snapshot()
+    regressed = False
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results["comparison"] = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+        regressed = any(row["regressed"] for row in results["comparison"].values())
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+    if regressed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+from core.db_config import make_async_client, make_client, read_preference
+
+
+class AsyncMongo:
+    """The ASGI app's counterpart of flask-pymongo's `mongo`.
+
+    `cx`/`db` are an AsyncMongoClient and its default database, opened when
+    the server starts. Maintenance work that only exists in sync form
+    (stats refreshes) gets a lazily created sync client to run in a thread.
+    """
+
+    def __init__(self):
+        self.cx = None
+        self.db = None
+        self._sync_cx = None
+        self._route_dbs = {}
+
+    def init_app(self, app):
+        @app.before_serving
+        async def connect():
+            self.cx = make_async_client()
+            self.db = self.cx.get_default_database()
+            self._route_dbs = {}
+
+        @app.after_serving
+        async def close():
+            await self.cx.close()
+            if self._sync_cx is not None:
+                self._sync_cx.close()
+
+    def read_db(self, route_class):
+        """self.db with the read preference configured for a route class."""
+        db = self._route_dbs.get(route_class)
+        if db is None:
+            db = self._route_dbs[route_class] = self.db.with_options(read_preference=read_preference(route_class))
+        return db
+
+    def sync_db(self):
+        if self._sync_cx is None:
+            self._sync_cx = make_client()
+        return self._sync_cx.get_default_database()
+
+
+amongo = AsyncMongo()
@@ -0,0 +1,217 @@
+from bson import json_util
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MISSING = object()
+
+
+class BaseCache:
+    """Common read-through logic shared by every backend.
+
+    Backends implement get/set/_delete; get returns MISSING on a miss.
+    Cached values are shared between requests and must not be mutated.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._key_locks = {}
+        self._async_locks = {}
+        self._inflight = {}
+        self._key_locks_guard = threading.Lock()
+
+    def get_or_load(self, key, loader, ttl=None):
+        """Return the cached value or call loader() once per key.
+
+        Concurrent misses on the same key wait for the first loader instead
+        of all hitting MongoDB when a hot entry expires. None results are
+        not cached so missing documents are re-checked.
+        """
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+
+        with self._key_locks_guard:
+            lock = self._key_locks.setdefault(key, threading.Lock())
+        with lock:
+            try:
+                value = self.get(key, count=False)
+                if value is MISSING:
+                    self._begin_load(key)
+                    value = loader()
+                    self._end_load(key, value, ttl)
+                return value
+            finally:
+                with self._key_locks_guard:
+                    self._key_locks.pop(key, None)
+
+    async def get_or_load_async(self, key, loader, ttl=None):
+        """get_or_load for the ASGI app; loader is a coroutine function."""
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+
+        lock = self._async_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            try:
+                value = self.get(key, count=False)
+                if value is MISSING:
+                    self._begin_load(key)
+                    value = await loader()
+                    self._end_load(key, value, ttl)
+                return value
+            finally:
+                self._async_locks.pop(key, None)
+
+    def _begin_load(self, key):
+        with self._key_locks_guard:
+            self._inflight[key] = False
+
+    def _end_load(self, key, value, ttl):
+        with self._key_locks_guard:
+            # Skip the write if the key was invalidated mid-load
+            invalidated = self._inflight.pop(key, False)
+        if value is not None and not invalidated:
+            self.set(key, value, ttl)
+
+    def delete(self, *keys):
+        with self._key_locks_guard:
+            for key in keys:
+                if key in self._inflight:
+                    self._inflight[key] = True
+        self._delete(keys)
+
+    def stats(self):
+        return {"backend": type(self).__name__, "hits": self.hits, "misses": self.misses}
+
+
+class LRUCache(BaseCache):
+    """In-process LRU cache with per-entry TTL."""
+
+    def __init__(self, maxsize=1024, ttl=30):
+        super().__init__(ttl)
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, count=True):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            if count:
+                self.misses += 1
+            return MISSING
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return dict(super().stats(), evictions=self.evictions, size=len(self._data), maxsize=self.maxsize)
+
+
+class RedisCache(BaseCache):
+    """Shared cache backend; values are stored as extended JSON."""
+
+    def __init__(self, url, ttl=30, prefix="eventmate:"):
+        super().__init__(ttl)
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key, count=True):
+        raw = self._client.get(self._prefix + key)
+        if count:
+            if raw is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return MISSING if raw is None else json_util.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self._prefix + key, json_util.dumps(value), ex=self.ttl if ttl is None else ttl)
+
+    def _delete(self, keys):
+        if keys:
+            self._client.delete(*(self._prefix + key for key in keys))
+
+    def clear(self):
+        for key in self._client.scan_iter(self._prefix + "*"):
+            self._client.delete(key)
+
+    def stats(self):
+        # Evictions are tracked server-side for the whole Redis instance
+        evictions = self._client.info("stats").get("evicted_keys")
+        return dict(super().stats(), evictions=evictions)
+
+
+def make_cache(prefix="eventmate:", max_entries="CACHE_MAX_ENTRIES"):
+    """Build the cache backend selected by CACHE_BACKEND (memory|redis).
+
+    `max_entries` names the env var sizing the memory backend; `prefix`
+    keeps Redis-backed caches from clearing each other's keys.
+    """
+    ttl = float(os.getenv("CACHE_TTL", 30))
+    if os.getenv("CACHE_BACKEND", "memory") == "redis":
+        return RedisCache(os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"), ttl=ttl, prefix=prefix)
+    return LRUCache(maxsize=int(os.getenv(max_entries, 1024)), ttl=ttl)
+
+
+cache = make_cache()
+
+# Profiles live apart from event data: event traffic cannot evict them and
+# cache.clear() after a bulk import leaves them alone
+user_cache = make_cache(prefix="eventmate-users:", max_entries="USER_CACHE_MAX_ENTRIES")
+
+
+def event_key(event_id):
+    return f"event:{event_id}"
+
+
+def reviews_key(event_id):
+    return f"reviews:{event_id}"
+
+
+def invalidate_event(event_id):
+    """Drop every cached view of an event after it changes."""
+    event_id = str(event_id)
+    cache.delete(event_key(event_id), reviews_key(event_id))
+
+
+def user_key(user_id):
+    return f"user:{user_id}"
+
+
+def invalidate_user(user_id):
+    user_cache.delete(user_key(str(user_id)))
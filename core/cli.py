@@ -0,0 +1,122 @@
+import click
+import sys
+from bson import ObjectId
+from core.db import mongo
+from core.indexes import apply_indexes
+from core.migrations import migrate_embedded_reviews, migrate_booking_user_ids
+from core.ratings import reconcile_ratings
+from core.search import backfill_search_fields
+from core.importer import import_events
+from core.cache import cache
+from core.stats import DIMENSIONS, refresh_stats
+from core.inventory import enable_sharding, disable_sharding, rebalance, rebalance_all
+
+
+def register_commands(app):
+    """Attach management commands to `flask --app app ...`"""
+
+    @app.cli.command("indexes")
+    @click.option("--check", is_flag=True, help="Report missing/drifted indexes without creating them.")
+    @click.option("--fix", is_flag=True, help="Drop and rebuild indexes whose definition drifted.")
+    def indexes_command(check, fix):
+        """Create the registry indexes and report build time and drift."""
+        report = apply_indexes(mongo.db, create=not check, fix_drift=fix and not check)
+        for row in report:
+            seconds = f" {row['seconds']}s" if "seconds" in row else ""
+            error = f" {row['error']}" if "error" in row else ""
+            click.echo(f"{row['collection']:<10} {row['name']:<24} {row['status']}{seconds}{error}")
+        if any(row["status"] in ("missing", "drift", "error") for row in report):
+            raise SystemExit(1)
+
+    @app.cli.command("migrate-reviews")
+    @click.option("--batch-size", default=500, show_default=True)
+    def migrate_reviews_command(batch_size):
+        """Move embedded event reviews into the reviews collection."""
+        result = migrate_embedded_reviews(mongo.db, batch_size=batch_size, progress=click.echo)
+        click.echo(f"Migrated {result['reviews']} reviews from {result['events']} events.")
+
+    @app.cli.command("migrate-booking-users")
+    @click.option("--batch-size", default=1000, show_default=True)
+    def migrate_booking_users_command(batch_size):
+        """Store every bookings.user_id as an ObjectId."""
+        result = migrate_booking_user_ids(mongo.db, batch_size=batch_size, progress=click.echo)
+        for booking_id in result["conflicts"]:
+            click.echo(f"  {booking_id}: duplicates another confirmed booking, left unchanged", err=True)
+        for booking_id in result["invalid"]:
+            click.echo(f"  {booking_id}: user_id is not an ObjectId, left unchanged", err=True)
+        click.echo(f"Converted {result['converted']} bookings, {len(result['conflicts'])} conflicts, "
+                   f"{len(result['invalid'])} invalid.")
+        if result["conflicts"] or result["invalid"]:
+            raise SystemExit(1)
+
+    @app.cli.command("reconcile-ratings")
+    @click.option("--dry-run", is_flag=True, help="Report drifted events without rewriting them.")
+    def reconcile_ratings_command(dry_run):
+        """Recompute avg_rating/review_count/rating_hist from the reviews collection."""
+        result = reconcile_ratings(mongo.db, fix=not dry_run)
+        click.echo(f"Checked {result['checked']} events, {result['drifted']} drifted"
+                   f"{'' if dry_run else ' and fixed'}.")
+
+    @app.cli.command("backfill-search")
+    @click.option("--batch-size", default=1000, show_default=True)
+    def backfill_search_command(batch_size):
+        """Populate the normalized search.* keyword fields on existing events."""
+        count = backfill_search_fields(mongo.db, batch_size=batch_size, progress=click.echo)
+        click.echo(f"Updated {count} events.")
+
+    @app.cli.command("import-events")
+    @click.argument("path")
+    @click.option("--batch-size", default=1000, show_default=True)
+    def import_events_command(path, batch_size):
+        """Stream a JSON array or NDJSON file of events into MongoDB ('-' for stdin)."""
+        stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+        try:
+            report = import_events(mongo.db, stream, batch_size=batch_size, progress=click.echo)
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+        # Only clears this process's memory cache; running apps drop their
+        # entries after CACHE_TTL unless they share CACHE_BACKEND=redis
+        cache.clear()
+        for error in report["errors"]:
+            click.echo(f"  row {error['row']}: {error['error']}", err=True)
+        if "error" in report:
+            click.echo(f"Stopped at line {report['line']}: {report['error']}", err=True)
+        click.echo(f"{report['rows']} rows in {report['seconds']}s ({report['rows_per_sec']} rows/sec): "
+                   f"{report['inserted']} inserted, {report['upserted']} upserted, {report['updated']} updated, "
+                   f"{report['invalid']} invalid, {report['failed']} failed")
+        if "error" in report:
+            raise SystemExit(1)
+
+    @app.cli.command("shard-seats")
+    @click.argument("event_id")
+    @click.option("--shards", default=8, show_default=True, help="Counter documents; 1 or less folds them back.")
+    def shard_seats_command(event_id, shards):
+        """Split an event's seats across counter shards for a flash sale."""
+        event_id = ObjectId(event_id)
+        event = mongo.db.events.find_one({"_id": event_id}, {"seat_shards": 1})
+        if event is None:
+            raise click.ClickException("Event not found")
+        if shards <= 1:
+            click.echo(f"Unsharded: {disable_sharding(mongo.db, event_id)} seats available.")
+        elif event.get("seat_shards"):
+            result = rebalance(mongo.db, event_id, shards)
+            click.echo(f"Resharded to {shards} shards: {result['available_seats']} seats available.")
+        else:
+            click.echo(f"Split {enable_sharding(mongo.db, event_id, shards)} seats across {shards} shards.")
+
+    @app.cli.command("rebalance-seats")
+    def rebalance_seats_command():
+        """Even out seat shards and sync available_seats on sharded events."""
+        for result in rebalance_all(mongo.db):
+            click.echo(f"{result['event_id']}: {result['available_seats']} seats, "
+                       f"moved {result['moved']} across {result['shards']} shards")
+
+    @app.cli.command("refresh-stats")
+    @click.option("--dimension", type=click.Choice(list(DIMENSIONS)), multiple=True,
+                  help="Only refresh these summaries (default: all).")
+    def refresh_stats_command(dimension):
+        """Rebuild the materialized stats_* summary collections."""
+        for name in dimension or DIMENSIONS:
+            refreshed_at = refresh_stats(mongo.db, name)
+            click.echo(f"stats_{name}: refreshed at {refreshed_at.isoformat()}")
@@ -0,0 +1,171 @@
+"""Negotiated response compression (zstd, br, gzip).
+
+Responses of at least COMPRESS_MIN_BYTES with a text/JSON mimetype are
+compressed with the best encoding the client accepts. zstd and br are used
+only if `zstandard` / `brotli` are installed; gzip always works. Streamed
+responses (NDJSON exports) are passed through untouched.
+
+Each route compresses at the level of its profile: "fast" for per-request
+bodies such as listings and search, "small" for representations with an
+ETag. Those are versioned, so their compressed bytes are kept in a small
+LRU keyed by path, ETag and encoding, and hot events/reviews are compressed
+once per version instead of on every hit.
+"""
+import gzip
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from core.cache import MISSING, LRUCache
+
+load_dotenv()
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+# Below this the saving is a few hundred bytes at most and not worth the CPU
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+COMPRESS_ENABLED = os.getenv("COMPRESS", "1") != "0"
+COMPRESS_CACHE_ENTRIES = int(os.getenv("COMPRESS_CACHE_ENTRIES", 512))
+# Keys carry the version, so the TTL only bounds how long cold entries stay
+COMPRESS_CACHE_TTL = float(os.getenv("COMPRESS_CACHE_TTL", 600))
+
+CODECS = {"gzip": lambda data, level: gzip.compress(data, compresslevel=level, mtime=0)}
+if zstandard is not None:
+    CODECS["zstd"] = lambda data, level: zstandard.ZstdCompressor(level=level).compress(data)
+if brotli is not None:
+    CODECS["br"] = lambda data, level: brotli.compress(data, quality=level)
+
+# Server preference when the client accepts several equally
+PREFERENCE = [name for name in os.getenv("COMPRESS_ENCODINGS", "zstd,br,gzip").split(",") if name in CODECS]
+
+LEVELS = {
+    "fast": {"zstd": 3, "br": 4, "gzip": 5},
+    "small": {"zstd": 12, "br": 9, "gzip": 9},
+}
+
+# Blueprint endpoint -> profile; anything not listed is "fast".
+# COMPRESS_ROUTE_PROFILES="events.get_events=small,..." adds or overrides.
+ROUTE_PROFILES = {
+    "events.get_event": "small",
+    "reviews.get_reviews": "small",
+}
+for item in filter(None, os.getenv("COMPRESS_ROUTE_PROFILES", "").split(",")):
+    endpoint, _, profile = item.partition("=")
+    if profile.strip() in LEVELS:
+        ROUTE_PROFILES[endpoint.strip()] = profile.strip()
+
+COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/")
+
+
+class CompressionStats:
+    def __init__(self):
+        self.responses = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, size_in, size_out, cpu_seconds, cached):
+        with self._lock:
+            self.responses += 1
+            self.cache_hits += cached
+            self.bytes_in += size_in
+            self.bytes_out += size_out
+            self.cpu_seconds += cpu_seconds
+
+    def snapshot(self):
+        return {"encodings": PREFERENCE, "min_bytes": COMPRESS_MIN_BYTES, "responses": self.responses,
+                "cache_hits": self.cache_hits, "bytes_in": self.bytes_in, "bytes_out": self.bytes_out,
+                "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+                "cpu_ms": round(self.cpu_seconds * 1000, 1), "cache": compressed_cache.stats()}
+
+
+compression_stats = CompressionStats()
+compressed_cache = LRUCache(maxsize=COMPRESS_CACHE_ENTRIES, ttl=COMPRESS_CACHE_TTL)
+
+
+def negotiate(req):
+    """The encoding to use for this request, or None for identity."""
+    if not PREFERENCE or not req.accept_encodings:
+        return None
+    return req.accept_encodings.best_match(PREFERENCE)
+
+
+def compressible(req, response):
+    return (COMPRESS_ENABLED
+            and response.status_code == 200
+            and req.method != "HEAD"
+            and "Content-Encoding" not in response.headers
+            and "no-transform" not in response.headers.get("Cache-Control", "")
+            and (response.mimetype or "").startswith(COMPRESSIBLE))
+
+
+def compress(data, encoding, endpoint, cache_key=None):
+    """Compressed `data`, reusing the cached bytes for `cache_key` if any."""
+    level = LEVELS[ROUTE_PROFILES.get(endpoint, "fast")][encoding]
+    key = cache_key and f"{encoding}:{level}:{cache_key}"
+    if key:
+        body = compressed_cache.get(key)
+        if body is not MISSING:
+            compression_stats.record(len(data), len(body), 0.0, True)
+            return body
+    started = time.thread_time()
+    body = CODECS[encoding](data, level)
+    compression_stats.record(len(data), len(body), time.thread_time() - started, False)
+    if key:
+        compressed_cache.set(key, body)
+    return body
+
+
+def _apply(req, response, data, encoding):
+    tag, _ = response.get_etag()
+    # Versioned bodies are the same bytes for every hit of that version
+    cache_key = f"{req.full_path}:{tag}" if tag else None
+    response.set_data(compress(data, encoding, req.endpoint, cache_key))
+    response.headers["Content-Encoding"] = encoding
+    if tag:
+        # The compressed bytes differ from the identity ones; a weak tag
+        # still validates conditional requests for either
+        response.set_etag(tag, weak=True)
+
+
+def init_compression(app):
+    """Compress eligible Flask responses. Register after init_metrics so
+    the recorded response size is the compressed one."""
+    from flask import request
+
+    @app.after_request
+    def compress_response(response):
+        if response.is_streamed or response.direct_passthrough or not compressible(request, response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate(request)
+        if encoding and (response.content_length or 0) >= COMPRESS_MIN_BYTES:
+            _apply(request, response, response.get_data(), encoding)
+        return response
+
+
+def init_compression_async(app):
+    """init_compression for the Quart app."""
+    from quart import request
+    from quart.wrappers.response import DataBody
+
+    @app.after_request
+    async def compress_response(response):
+        # Streamed bodies and werkzeug error responses are left alone
+        if not isinstance(getattr(response, "response", None), DataBody) or not compressible(request, response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate(request)
+        if encoding and (response.content_length or 0) >= COMPRESS_MIN_BYTES:
+            _apply(request, response, await response.get_data(), encoding)
+        return response
@@ -1,13 +1,54 @@
-from flask_pymongo import PyMongo
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-
-mongo = PyMongo()
-
-def init_db(app):
-    """Initialize MongoDB connection with Flask app"""
-    app.config["MONGO_URI"] = os.getenv("MONGO_URI")
-    mongo.init_app(app)
-    return mongo
+from flask_pymongo import PyMongo
+from pymongo.errors import PyMongoError
+from dotenv import load_dotenv
+from core.indexes import UNIQUE_BOOKINGS, apply_indexes
+from core.metrics import command_listener
+from core.db_config import client_options, pool_stats, read_preference
+import os
+import threading
+
+load_dotenv()
+
+mongo = PyMongo()
+
+def init_db(app):
+    """Initialize MongoDB connection with Flask app"""
+    app.config["MONGO_URI"] = os.getenv("MONGO_URI")
+    # Pool size, timeouts and compression come from core.db_config; the
+    # listeners feed per-request query counts and pool stats into /metrics
+    mongo.init_app(app, event_listeners=[command_listener, pool_stats], **client_options())
+
+    # Index builds can take a while on large collections, so run them
+    # off the startup path. Disable with MONGO_ENSURE_INDEXES=0 and use
+    # `flask --app app indexes` instead.
+    if os.getenv("MONGO_ENSURE_INDEXES", "1") != "0":
+        threading.Thread(target=ensure_indexes, args=(app,), daemon=True).start()
+    return mongo
+
+_route_dbs = {}
+
+def read_db(route_class):
+    """mongo.db with the read preference configured for a route class."""
+    db = _route_dbs.get(route_class)
+    if db is None or db.client is not mongo.cx:
+        db = mongo.db.with_options(read_preference=read_preference(route_class))
+        _route_dbs[route_class] = db
+    return db
+
+def ensure_indexes(app):
+    """Apply the index registry and log what changed"""
+    try:
+        report = apply_indexes(mongo.db)
+    except PyMongoError as e:
+        app.logger.warning("Index bootstrap failed: %s", e)
+        return
+    for row in report:
+        if row["status"] == "ok":
+            continue
+        if row["name"] == UNIQUE_BOOKINGS and row["status"] == "error":
+            app.logger.error("Index bookings.%s could not be built (%s). Duplicate confirmed bookings are "
+                             "only checked by a lookup before each booking until they are removed and "
+                             "`flask --app app indexes` succeeds.", UNIQUE_BOOKINGS, row["error"])
+            continue
+        app.logger.warning("Index %s.%s: %s%s", row["collection"], row["name"], row["status"],
+                           f" ({row['seconds']}s)" if "seconds" in row else "")
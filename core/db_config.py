@@ -0,0 +1,154 @@
+import importlib.util
+import os
+import threading
+from pymongo import AsyncMongoClient, MongoClient, ReadPreference, monitoring
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Wire compressors and the package each one needs; missing ones are skipped
+COMPRESSOR_PACKAGES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
+# Route class -> env var holding its read preference. Event reads tolerate
+# slightly stale data; everything else (auth, bookings, writes) stays on
+# the primary so users always see their own writes.
+ROUTE_CLASSES = {
+    "events_read": ("MONGO_READ_PREF_EVENTS", "secondaryPreferred"),
+    "stats_read": ("MONGO_READ_PREF_STATS", "secondaryPreferred"),
+    "default": ("MONGO_READ_PREF_DEFAULT", "primary"),
+}
+
+
+def _int_env(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def compressors():
+    """Configured compressors (MONGO_COMPRESSORS) whose libraries are installed."""
+    names = [n.strip() for n in os.getenv("MONGO_COMPRESSORS", "zstd,snappy").split(",") if n.strip()]
+    available = []
+    for name in names:
+        if name not in COMPRESSOR_PACKAGES:
+            raise ValueError(f"Unknown MONGO_COMPRESSORS entry: {name}")
+        package = COMPRESSOR_PACKAGES[name]
+        if package is None or importlib.util.find_spec(package):
+            available.append(name)
+    return available
+
+
+def client_options(**overrides):
+    """MongoClient keyword arguments shared by the app, seed and bench scripts."""
+    options = {
+        "maxPoolSize": _int_env("MONGO_MAX_POOL_SIZE", 100),
+        "minPoolSize": _int_env("MONGO_MIN_POOL_SIZE", 0),
+        "maxIdleTimeMS": _int_env("MONGO_MAX_IDLE_TIME_MS", 60000),
+        # Fail fast instead of queueing forever when the pool is exhausted
+        "waitQueueTimeoutMS": _int_env("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000),
+        "serverSelectionTimeoutMS": _int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "connectTimeoutMS": _int_env("MONGO_CONNECT_TIMEOUT_MS", 5000),
+        "socketTimeoutMS": _int_env("MONGO_SOCKET_TIMEOUT_MS", 30000),
+        "retryWrites": os.getenv("MONGO_RETRY_WRITES", "1") != "0",
+        "retryReads": True,
+        "appname": os.getenv("MONGO_APP_NAME", "eventmate"),
+    }
+    enabled = compressors()
+    if enabled:
+        options["compressors"] = ",".join(enabled)
+    options.update(overrides)
+    return options
+
+
+def read_preference(route_class):
+    """Read preference for a route class (MONGO_READ_PREF_* env vars)."""
+    env_name, default = ROUTE_CLASSES.get(route_class, ROUTE_CLASSES["default"])
+    name = os.getenv(env_name, default)
+    max_staleness = _int_env("MONGO_MAX_STALENESS_SECONDS", -1)
+    mode = read_pref_mode_from_name(name)
+    if mode == ReadPreference.PRIMARY.mode:
+        return ReadPreference.PRIMARY
+    return make_read_preference(mode, tag_sets=None, max_staleness=max_staleness)
+
+
+def make_client(uri=None, **overrides):
+    """MongoClient for scripts, configured like the app's client."""
+    return MongoClient(uri or os.getenv("MONGO_URI"), **client_options(**overrides))
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters per server, exposed via /db/pool and /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools = {}
+
+    def _pool(self, address):
+        key = "%s:%s" % address
+        return self._pools.setdefault(key, {
+            "open": 0, "checked_out": 0, "created": 0, "closed": 0,
+            "checkouts": 0, "checkout_failures": 0, "checkout_wait_seconds": 0.0,
+            "pool_cleared": 0,
+        })
+
+    def _update(self, event, **deltas):
+        with self._lock:
+            pool = self._pool(event.address)
+            for field, delta in deltas.items():
+                pool[field] += delta
+
+    def connection_created(self, event):
+        self._update(event, open=1, created=1)
+
+    def connection_closed(self, event):
+        self._update(event, open=-1, closed=1)
+
+    def connection_checked_out(self, event):
+        self._update(event, checked_out=1, checkouts=1,
+                     checkout_wait_seconds=getattr(event, "duration", 0) or 0)
+
+    def connection_check_out_failed(self, event):
+        # Pool exhaustion shows up here as waitQueueTimeoutMS expiries
+        self._update(event, checkout_failures=1)
+
+    def connection_checked_in(self, event):
+        self._update(event, checked_out=-1)
+
+    def pool_cleared(self, event):
+        self._update(event, pool_cleared=1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            return {address: dict(pool) for address, pool in self._pools.items()}
+
+    def totals(self):
+        """Counters summed across servers (flat, for /metrics)."""
+        totals = {}
+        for pool in self.snapshot().values():
+            for field, value in pool.items():
+                totals[field] = totals.get(field, 0) + value
+        return totals
+
+
+pool_stats = PoolStats()
+
+
+def make_async_client(uri=None, **overrides):
+    """AsyncMongoClient with the same settings, for the ASGI app."""
+    return AsyncMongoClient(uri or os.getenv("MONGO_URI"), event_listeners=[pool_stats],
+                            **client_options(**overrides))
@@ -0,0 +1,64 @@
+"""Event versions and conditional GET.
+
+Every write that changes what GET /events/<id> or GET /reviews/<event_id>
+returns bumps the event's `version` and `updated_at`, so both resources can
+be validated from those two fields alone. The exception is the seat count of
+a sharded event (core.inventory), which the event's ETag includes instead.
+"""
+from datetime import timezone
+from core.cache import MISSING, cache, event_key
+
+VERSION_FIELDS = {"version": 1, "updated_at": 1, "seat_shards": 1}
+
+# Same bump for pipeline-style updates (e.g. rating deltas)
+PIPELINE_BUMP = {"$set": {"version": {"$add": [{"$ifNull": ["$version", 0]}, 1]}, "updated_at": "$$NOW"}}
+
+
+def bump(update):
+    """Return `update` with $inc version / $currentDate updated_at added."""
+    update = dict(update)
+    update["$inc"] = {**update.get("$inc", {}), "version": 1}
+    update["$currentDate"] = {**update.get("$currentDate", {}), "updated_at": True}
+    return update
+
+
+def touch_event(db, event_id):
+    """Steps (core.flow) bumping an event's version for changes stored
+    outside the event (reviews)."""
+    yield lambda: db.events.update_one({"_id": event_id}, bump({}))
+
+
+def etag(kind, event_id, version):
+    """Strong ETag for one representation ("event" or "reviews") of an event."""
+    return f"{kind}-{event_id}-{version or 0}"
+
+
+def _utc(value):
+    # PyMongo returns naive UTC datetimes
+    return value.replace(tzinfo=timezone.utc) if value and value.tzinfo is None else value
+
+
+def not_modified(req, tag, updated_at):
+    """True if the request's If-None-Match / If-Modified-Since still match."""
+    if req.if_none_match:
+        return req.if_none_match.contains_weak(tag)
+    if req.if_modified_since and updated_at:
+        return _utc(updated_at).replace(microsecond=0) <= req.if_modified_since
+    return False
+
+
+def with_validators(response, tag, updated_at):
+    response.set_etag(tag)
+    if updated_at:
+        response.last_modified = _utc(updated_at)
+    return response
+
+
+def version_meta(db, event_id):
+    """Steps for an event's version/updated_at: from its cache entry if there
+    is one, otherwise a projection-only lookup. None if the event does not
+    exist."""
+    event = cache.get(event_key(event_id))
+    if event is MISSING:
+        event = yield lambda: db.events.find_one({"_id": event_id}, VERSION_FIELDS)
+    return event
@@ -0,0 +1,127 @@
+"""Database logic written once for the Flask (sync) and Quart (async) apps.
+
+Code that talks to MongoDB is written as a generator that yields the calls
+it needs made and is sent back their results:
+
+    def find_booking(db, booking_id):
+        booking = yield lambda: db.bookings.find_one({"_id": booking_id})
+        if booking is None:
+            raise ReservationError("Booking not found", 404)
+        return booking
+
+run() drives such "steps" against a PyMongo database and run_async()
+against an AsyncMongoClient one, awaiting whatever a call returns. An
+exception raised by a call is thrown back in at the yield, so steps handle
+driver errors with ordinary try/except. Steps compose with `yield from`.
+
+Besides zero-argument callables, steps may yield:
+- Many(make_cursor): the documents of the cursor make_cursor() returns
+- Call(sync_fn, async_fn, *args): work with separate sync and async forms
+  (password hashing, cache loads, transactions)
+- a generator: nested steps, run to completion
+- a list of the above: run concurrently by run_async and in order by run;
+  the result is a list with each failure's exception in place of its value
+"""
+import asyncio
+import inspect
+
+
+class Many:
+    """Step yielding the documents of a find/aggregate cursor as a list."""
+
+    def __init__(self, make_cursor):
+        self.make_cursor = make_cursor
+
+
+class Call:
+    """Step calling sync_fn under run() and awaiting async_fn under run_async()."""
+
+    def __init__(self, sync_fn, async_fn, *args):
+        self.sync_fn = sync_fn
+        self.async_fn = async_fn
+        self.args = args
+
+
+def run(steps):
+    """Drive steps with a sync (PyMongo) database; returns their result."""
+    value, error = None, None
+    while True:
+        try:
+            op = steps.send(value) if error is None else steps.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            value, error = _call(op), None
+        except Exception as e:
+            value, error = None, e
+
+
+def _call(op):
+    if isinstance(op, list):
+        results = []
+        for item in op:
+            try:
+                results.append(_call(item))
+            except Exception as e:
+                results.append(e)
+        return results
+    if inspect.isgenerator(op):
+        return run(op)
+    if isinstance(op, Many):
+        return list(op.make_cursor())
+    if isinstance(op, Call):
+        return op.sync_fn(*op.args)
+    return op()
+
+
+async def run_async(steps):
+    """Drive steps with an async (AsyncMongoClient) database."""
+    value, error = None, None
+    while True:
+        try:
+            op = steps.send(value) if error is None else steps.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            value, error = await _call_async(op), None
+        except Exception as e:
+            value, error = None, e
+
+
+async def _call_async(op):
+    if isinstance(op, list):
+        return await asyncio.gather(*(_call_async(item) for item in op), return_exceptions=True)
+    if inspect.isgenerator(op):
+        return await run_async(op)
+    if isinstance(op, Many):
+        cursor = op.make_cursor()
+        # AsyncCollection.aggregate is a coroutine; find returns the cursor
+        if inspect.isawaitable(cursor):
+            cursor = await cursor
+        return await cursor.to_list()
+    if isinstance(op, Call):
+        return await op.async_fn(*op.args)
+    result = op()
+    return await result if inspect.isawaitable(result) else result
+
+
+def cached(cache, key, load, ttl=None):
+    """Step for cache.get_or_load() whose loader is load() -> steps."""
+    return Call(lambda: cache.get_or_load(key, lambda: run(load()), ttl),
+                lambda: cache.get_or_load_async(key, lambda: run_async(load()), ttl))
+
+
+def _transaction(client, make_steps):
+    with client.start_session() as session:
+        return session.with_transaction(lambda s: run(make_steps(s)))
+
+
+async def _transaction_async(client, make_steps):
+    async with client.start_session() as session:
+        return await session.with_transaction(lambda s: run_async(make_steps(s)))
+
+
+def transaction(client, make_steps):
+    """Step running make_steps(session) in a transaction. The driver may
+    retry it, so make_steps is called again for every attempt."""
+    return Call(_transaction, _transaction_async, client, make_steps)
@@ -0,0 +1,589 @@
+"""Route logic shared by the Flask (routes/) and Quart (async_routes/) apps.
+
+Each handler is steps (core.flow) ending in a Reply. The route layers only
+pick the database, pass request data in and drive the handler with
+respond() or respond_async(). Request bodies are passed as `body`, the
+framework's get_json method, so parsing errors are handled exactly where
+they were when every route read the body itself.
+"""
+from bson import ObjectId
+from pymongo import ReturnDocument
+from core.cache import cache, event_key, invalidate_event, invalidate_user, reviews_key, user_cache, user_key
+from core.etags import VERSION_FIELDS, etag, not_modified, touch_event, version_meta, with_validators
+from core.flow import Call, Many, cached, run, run_async
+from core.geo import NEARBY_CACHE_TTL
+from core.importer import import_stream
+from core.inventory import forget as forget_shards, with_available
+from core.pagination import MAX_LIMIT, next_link, parse_limit
+from core.passwords import (
+    HashPoolBusy, hash_password, hash_password_async, needs_rehash, verify_password, verify_password_async,
+)
+from core.queries import (
+    REVIEWS_PAGE_SIZE, bulk_body, bulk_bookings, event_listing, event_search, event_update, listing_body,
+    nearby_body, nearby_search, new_booking, new_event, new_review, owned_booking, profile_updates, review_page,
+    review_page_body, review_updates, user_bookings_query,
+)
+from core.ratelimit import login_limiter
+from core.ratings import apply_rating_delta
+from core.reservations import UNSHARDED, ReservationError, atomic, book_many, book_seats, change_status, remove_booking
+from core.search import HIDDEN_FIELDS
+from core.stats import DEFAULT_SORT, DIMENSIONS
+from core.streaming import NDJSON_MIMETYPE, ndjson_chunks_async, ndjson_response
+from core.tokens import blocklist
+
+
+class Reply:
+    """A handler's answer: a JSON body (None for 304) and status, optional
+    ETag/Last-Modified validators and headers, or a cursor to stream."""
+
+    def __init__(self, body=None, status=200, tag=None, updated_at=None, headers=None, stream=None):
+        self.body = body
+        self.status = status
+        self.tag = tag
+        self.updated_at = updated_at
+        self.headers = headers or {}
+        self.stream = stream
+
+
+def error(message, status):
+    return Reply({"error": message}, status)
+
+
+def _build(reply, jsonify, response_class, stream):
+    if reply.stream is not None:
+        return stream(reply.stream)
+    response = response_class("", status=reply.status) if reply.body is None else jsonify(reply.body)
+    if reply.tag:
+        with_validators(response, reply.tag, reply.updated_at)
+    response.headers.update(reply.headers)
+    return response, reply.status
+
+
+def respond(steps):
+    """Drive a handler in the Flask app and build its response."""
+    from flask import current_app, jsonify
+    return _build(run(steps), jsonify, current_app.response_class, ndjson_response)
+
+
+async def respond_async(steps):
+    """Drive a handler in the Quart app and build its response."""
+    from quart import current_app, jsonify
+
+    def stream(cursor):
+        chunks = ndjson_chunks_async(cursor, current_app.json.dumps_bytes)
+        return current_app.response_class(chunks, mimetype=NDJSON_MIMETYPE)
+
+    return _build(await run_async(steps), jsonify, current_app.response_class, stream)
+
+
+# EVENTS
+
+def get_events(db, args):
+    try:
+        listing = event_listing(args)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    events = yield Many(lambda: db.events.find(listing.query, listing.projection)
+                        .sort(listing.sort).skip(listing.skip).limit(listing.fetch))
+    headers = None
+    if not listing.paged and len(events) > listing.limit:
+        headers = {"Link": next_link(args, page=listing.skip // listing.limit + 2)}
+    return Reply(listing_body(listing, events), headers=headers)
+
+
+def get_event(db, event_id, req):
+    try:
+        oid = ObjectId(event_id)
+    except Exception:
+        return error("Invalid event ID", 400)
+
+    if req.if_none_match or req.if_modified_since:
+        meta = yield from version_meta(db, oid)
+        if meta:
+            tag, updated_at = _event_validators(oid, (yield from with_available(db, meta)))
+            if not_modified(req, tag, updated_at):
+                return Reply(None, 304, tag, updated_at)
+
+    def load():
+        event = yield lambda: db.events.find_one({"_id": oid}, HIDDEN_FIELDS)
+        return (yield from with_available(db, event))
+
+    event = yield cached(cache, event_key(oid), load)
+    if not event:
+        return error("Event not found", 404)
+    return Reply(event, 200, *_event_validators(oid, event))
+
+
+def _event_validators(oid, event):
+    """ETag and Last-Modified of an event. Seats on a sharded event change
+    without a version bump, so its tag carries them and it has no date."""
+    if event.get("seat_shards"):
+        return etag("event", oid, f"{event.get('version') or 0}.{event.get('available_seats')}"), None
+    return etag("event", oid, event.get("version")), event.get("updated_at")
+
+
+def create_event(db, body):
+    data = yield body
+    try:
+        event = new_event(data)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    result = yield lambda: db.events.insert_one(event)
+    return Reply({
+        "message": "Event created successfully",
+        "event_id": str(result.inserted_id)
+    }, 201)
+
+
+def bulk_import_events(db, args, read):
+    """`read` is an op returning the next chunk of the request body (empty
+    at the end), so the body is parsed as it streams in."""
+    try:
+        batch_size = max(1, min(int(args.get("batch_size", 1000)), 10000))
+    except ValueError as e:
+        return error(str(e), 400)
+    report = yield from import_stream(db, read, batch_size=batch_size)
+    # New or changed events can show up in cached listings and searches
+    if report["inserted"] or report["upserted"] or report["updated"]:
+        cache.clear()
+    # Malformed body: rows before report["line"] were still written
+    return Reply(report, 400 if "error" in report else 200)
+
+
+def update_event(db, event_id, body):
+    try:
+        data = yield body
+        update = event_update(data)
+        query = {"_id": ObjectId(event_id)}
+        if "available_seats" in update["$set"]:
+            # A sharded event's seats live in its shards (core.inventory)
+            query.update(UNSHARDED)
+        result = yield lambda: db.events.update_one(query, update)
+        invalidate_event(ObjectId(event_id))
+        if result.matched_count == 0:
+            if "seat_shards" in query and (yield lambda: db.events.find_one({"_id": query["_id"]}, {"_id": 1})):
+                return error("available_seats cannot be set on a sharded event", 409)
+            return error("Event not found", 404)
+        return Reply({"message": "Event updated successfully"})
+    except Exception:
+        return error("Invalid event ID", 400)
+
+
+def delete_event(db, event_id):
+    def apply(session):
+        result = yield lambda: db.events.delete_one({"_id": oid}, session=session)
+        if result.deleted_count:
+            yield lambda: db.reviews.delete_many({"event_id": oid}, session=session)
+            yield lambda: db.seat_shards.delete_many({"event_id": oid}, session=session)
+        return result.deleted_count
+
+    try:
+        oid = ObjectId(event_id)
+        deleted = yield from atomic(db, apply)
+        invalidate_event(oid)
+        forget_shards(oid)
+        if not deleted:
+            return error("Event not found", 404)
+        return Reply({"message": "Event deleted successfully"})
+    except Exception:
+        return error("Invalid event ID", 400)
+
+
+def search_events(db, args, stream):
+    try:
+        listing = event_search(args)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    cursor = db.events.find(listing.query, listing.projection)
+    if listing.sort:
+        cursor = cursor.sort(listing.sort)
+
+    if stream:
+        if "limit" in args:
+            cursor = cursor.skip(listing.skip).limit(listing.limit)
+        return Reply(stream=cursor)
+
+    events = yield Many(lambda: cursor.skip(listing.skip).limit(listing.fetch))
+    headers = None
+    if len(events) > listing.limit:
+        # Search used to return every match; point clients at the next page
+        headers = {"Link": next_link(args, page=listing.skip // listing.limit + 2)}
+    return Reply(events[:listing.limit], headers=headers)
+
+
+def nearby_events(db, args):
+    try:
+        nearby = nearby_search(args)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    def load():
+        return (yield Many(lambda: db.events.aggregate(nearby.pipeline)))
+
+    # Requests from the same geohash cell share one cached result
+    if nearby.cache_key:
+        events = yield cached(cache, nearby.cache_key, load, ttl=NEARBY_CACHE_TTL)
+    else:
+        events = yield from load()
+    return Reply(nearby_body(nearby, events))
+
+
+def category_stats(summary):
+    """`summary` is a call returning the refreshed stats_category collection."""
+    collection = yield summary
+    stats = yield Many(lambda: collection.find({}, {"total_events": 1}).sort(DEFAULT_SORT["category"]).limit(3))
+    return Reply(stats)
+
+
+def dimension_stats(dimension, args, summary):
+    if dimension not in DIMENSIONS:
+        return error(f"dimension must be one of: {', '.join(DIMENSIONS)}", 404)
+    try:
+        limit = parse_limit(args.get("limit"), default=MAX_LIMIT)
+    except ValueError as e:
+        return error(str(e), 400)
+    collection = yield summary
+    stats = yield Many(lambda: collection.find().sort(DEFAULT_SORT[dimension]).limit(limit))
+    return Reply(stats)
+
+
+# REVIEWS
+
+def get_reviews(db, event_id, req):
+    try:
+        oid, query, limit, cursor = review_page(event_id, req.args)
+    except Exception as e:
+        return error(str(e), 400)
+
+    if req.if_none_match or req.if_modified_since:
+        meta = yield from version_meta(db, oid)
+        if meta:
+            tag = etag("reviews", oid, meta.get("version"))
+            if not_modified(req, tag, meta.get("updated_at")):
+                return Reply(None, 304, tag, meta.get("updated_at"))
+
+    def load():
+        # Version first (not concurrently): the page may then be newer than
+        # its ETag, never older
+        meta = yield lambda: db.events.find_one({"_id": oid}, VERSION_FIELDS)
+        if meta is None:
+            return None
+        reviews = yield Many(lambda: db.reviews.find(query).sort("_id", -1).limit(limit + 1))
+        return dict(review_page_body(reviews, limit), version=meta.get("version"), updated_at=meta.get("updated_at"))
+
+    # Only the default first page is cached (and invalidated on writes)
+    if not cursor and limit == REVIEWS_PAGE_SIZE:
+        page = yield cached(cache, reviews_key(oid), load)
+    else:
+        page = yield from load()
+
+    if page is None:
+        return error("Event not found", 404)
+    headers = None
+    if "cursor" in req.args:
+        body = {"reviews": page["reviews"], "next_cursor": page["next_cursor"]}
+    else:
+        # Plain-list clients used to get every review; point them at the
+        # rest with ?after=, which keeps the plain-list shape
+        body = page["reviews"]
+        if page["next_cursor"]:
+            headers = {"Link": next_link(req.args, after=page["next_cursor"])}
+    return Reply(body, 200, etag("reviews", oid, page["version"]), page["updated_at"], headers)
+
+
+def add_review(db, event_id, body):
+    try:
+        oid = ObjectId(event_id)
+        data = yield body
+        try:
+            review = new_review(oid, data)
+        except ValueError as e:
+            return error(str(e), 400)
+
+        if (yield lambda: db.events.count_documents({"_id": oid}, limit=1)) == 0:
+            return error("Event not found", 404)
+
+        result = yield lambda: db.reviews.insert_one(review)
+        yield from apply_rating_delta(db, oid, added=review["rating"])
+        invalidate_event(oid)
+
+        return Reply({"message": "Review added successfully", "review_id": str(result.inserted_id)}, 201)
+
+    except Exception as e:
+        return error(str(e), 400)
+
+
+def update_review(db, event_id, review_id, body):
+    try:
+        data = yield body
+        try:
+            updates = review_updates(data)
+        except ValueError as e:
+            return error(str(e), 400)
+
+        # The pre-image gives the old rating for the aggregate delta
+        before = yield lambda: db.reviews.find_one_and_update(
+            {"_id": ObjectId(review_id), "event_id": ObjectId(event_id)},
+            {"$set": updates},
+            projection={"rating": 1}
+        )
+        if before is None:
+            return error("Review not found", 404)
+
+        # Rating deltas bump the event version themselves; other edits need a touch
+        changed = "rating" in updates and (yield from apply_rating_delta(
+            db, ObjectId(event_id), added=updates["rating"], removed=before.get("rating")))
+        if not changed:
+            yield from touch_event(db, ObjectId(event_id))
+        invalidate_event(ObjectId(event_id))
+        return Reply({"message": "Review updated successfully"})
+
+    except Exception as e:
+        return error(str(e), 400)
+
+
+def delete_review(db, event_id, review_id):
+    try:
+        deleted = yield lambda: db.reviews.find_one_and_delete(
+            {"_id": ObjectId(review_id), "event_id": ObjectId(event_id)},
+            projection={"rating": 1}
+        )
+        if deleted is None:
+            return error("Review not found", 404)
+
+        if not (yield from apply_rating_delta(db, ObjectId(event_id), removed=deleted.get("rating"))):
+            yield from touch_event(db, ObjectId(event_id))
+        invalidate_event(ObjectId(event_id))
+
+        return Reply({"message": "Review deleted successfully"})
+
+    except Exception as e:
+        return error(str(e), 400)
+
+
+# BOOKINGS
+
+def get_user_bookings(db, user_id, args, stream):
+    try:
+        query = user_bookings_query(user_id, args)
+
+        # ?stream=1 / Accept: application/x-ndjson streams rows instead
+        if stream:
+            return Reply(stream=db.bookings.find(query))
+
+        bookings = yield Many(lambda: db.bookings.find(query))
+        return Reply(bookings)
+
+    except Exception as e:
+        return error(str(e), 500)
+
+
+def get_booking(db, booking_id):
+    try:
+        booking = yield lambda: db.bookings.find_one({"_id": ObjectId(booking_id)})
+
+        if not booking:
+            return error("Booking not found", 404)
+
+        return Reply(booking)
+    except Exception as e:
+        return error(str(e), 400)
+
+
+def create_booking(db, user_id, body):
+    try:
+        data = yield body
+        try:
+            booking = new_booking(user_id, data)
+        except ValueError as e:
+            return error(str(e), 400)
+
+        # Seats are taken atomically; duplicates are caught by a unique index
+        try:
+            inserted_id = yield from book_seats(db, booking)
+        except ReservationError as e:
+            return error(str(e), e.status)
+
+        booking["_id"] = inserted_id
+        return Reply({"message": "Booking successful", "booking": booking}, 201)
+
+    except Exception as e:
+        return error(str(e), 500)
+
+
+def create_bookings_bulk(db, user_id, body, max_items):
+    try:
+        data = yield body
+        try:
+            bookings, positions, results = bulk_bookings(user_id, data, max_items)
+        except ValueError as e:
+            return error(str(e), 400)
+
+        return Reply(bulk_body(results, positions, (yield from book_many(db, bookings))))
+
+    except Exception as e:
+        return error(str(e), 500)
+
+
+def update_booking(db, booking_id, user_id, body):
+    try:
+        data = yield body
+
+        if not data or "status" not in data:
+            return error("Missing status field", 400)
+
+        try:
+            booking = yield from change_status(db, owned_booking(booking_id, user_id), data["status"])
+        except ReservationError as e:
+            return error(str(e), e.status)
+
+        return Reply({"message": "Booking updated successfully", "booking": booking})
+
+    except Exception as e:
+        return error(str(e), 400)
+
+
+def delete_booking(db, booking_id, user_id):
+    try:
+        # Seats still held by the booking are restored in the same operation
+        try:
+            yield from remove_booking(db, owned_booking(booking_id, user_id))
+        except ReservationError as e:
+            return error(str(e), e.status)
+
+        return Reply({"message": "Booking deleted successfully"})
+
+    except Exception as e:
+        return error(str(e), 400)
+
+
+# AUTH
+# Password hashing is CPU-bound: the Flask app runs it on the request thread
+# (or the PASSWORD_HASH_WORKERS pool), the Quart app off the event loop.
+
+def _hash(password):
+    return Call(hash_password, hash_password_async, password)
+
+
+def _verify(stored, password):
+    return Call(verify_password, verify_password_async, stored, password)
+
+
+def register_user(db, body):
+    try:
+        data = yield body
+        username = data.get("username")
+        password = data.get("password")
+
+        if not username or not password:
+            return error("Username and password required", 400)
+
+        if (yield lambda: db.users.find_one({"username": username})):
+            return error("Username already exists", 400)
+
+        hashed_pw = yield _hash(password)
+        yield lambda: db.users.insert_one({
+            "username": username,
+            "password": hashed_pw
+        })
+
+        return Reply({"message": "User registered successfully"}, 201)
+    except HashPoolBusy as e:
+        return error(str(e), 503)
+    except Exception as e:
+        return error(str(e), 400)
+
+
+def login_user(db, body, client_ip, issue_token):
+    """`issue_token(identity, user)` returns an access token for the app."""
+    try:
+        data = yield body
+        username = data.get("username")
+        password = data.get("password")
+
+        if not username or not password:
+            return error("Missing username or password", 400)
+
+        # Throttle before touching the database or burning a hash
+        retry_after = login_limiter.check(username, client_ip)
+        if retry_after:
+            return Reply({"error": "Too many login attempts, try again later"}, 429,
+                         headers={"Retry-After": str(int(retry_after) + 1)})
+
+        user = yield lambda: db.users.find_one({"username": username})
+        if not user or not (yield _verify(user["password"], password)):
+            return error("Invalid username or password", 401)
+        login_limiter.succeeded(username)
+
+        # Upgrade hashes made with old parameters; the filter skips the write
+        # if the password changed concurrently
+        if needs_rehash(user["password"]):
+            rehashed = yield _hash(password)
+            yield lambda: db.users.update_one({"_id": user["_id"], "password": user["password"]},
+                                              {"$set": {"password": rehashed}})
+
+        # username/role travel in the token so routes don't re-read the user
+        return Reply({
+            "message": "Login successful",
+            "token": issue_token(str(user["_id"]), user)
+        })
+    except HashPoolBusy as e:
+        return error(str(e), 503)
+    except Exception as e:
+        return error(str(e), 400)
+
+
+def get_profile(db, user_id):
+    try:
+        def load():
+            return (yield lambda: db.users.find_one({"_id": ObjectId(user_id)}, {"password": 0}))
+
+        user = yield cached(user_cache, user_key(user_id), load)
+        if not user:
+            return error("User not found", 404)
+        return Reply(user)
+    except Exception as e:
+        return error(str(e), 400)
+
+
+def update_profile(db, user_id, body, issue_token):
+    try:
+        data = yield body
+        try:
+            # Hashed below, through the app's hashing path
+            updates = profile_updates(data, lambda password: password)
+        except ValueError as e:
+            return error(str(e), 400)
+        if "password" in updates:
+            updates["password"] = yield _hash(updates["password"])
+
+        user = yield lambda: db.users.find_one_and_update({"_id": ObjectId(user_id)}, {"$set": updates},
+                                                          {"password": 0}, return_document=ReturnDocument.AFTER)
+        invalidate_user(user_id)
+
+        if not user:
+            return error("User not found", 404)
+
+        # Older tokens carry a stale username or predate the new password,
+        # so revoke them and hand back a fresh one
+        blocklist.revoke_user(user_id)
+        return Reply({"message": "Profile updated successfully", "token": issue_token(user_id, user)})
+    except HashPoolBusy as e:
+        return error(str(e), 503)
+    except Exception as e:
+        return error(str(e), 400)
+
+
+def delete_profile(db, user_id):
+    try:
+        result = yield lambda: db.users.delete_one({"_id": ObjectId(user_id)})
+        invalidate_user(user_id)
+        blocklist.revoke_user(user_id)
+        if result.deleted_count == 0:
+            return error("User not found", 404)
+        return Reply({"message": "User account deleted successfully"})
+    except Exception as e:
+        return error(str(e), 400)
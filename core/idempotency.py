@@ -0,0 +1,159 @@
+"""Idempotency-Key support for retried writes.
+
+A request carrying an `Idempotency-Key` header is recorded in the
+`idempotency_keys` collection (scoped to the caller) before the view runs
+and its response is stored afterwards. A retry with the same key gets the
+stored response back without the view running again. Keys expire through a
+TTL index after IDEMPOTENCY_TTL seconds.
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta
+from functools import wraps
+from dotenv import load_dotenv
+from pymongo.errors import DuplicateKeyError
+from core.flow import run, run_async
+
+load_dotenv()
+
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", 24 * 3600))
+# A key still "started" after this long belongs to a request that died
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", 60))
+MAX_KEY_LENGTH = 255
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class KeyConflict(Exception):
+    """The key cannot be used for this request; carries the HTTP status."""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def _fingerprint(method, path, body):
+    return hashlib.sha256(b"\n".join([method.encode(), path.encode(), body or b""])).hexdigest()
+
+
+def _claim(now, key_id, fingerprint):
+    return {"_id": key_id, "state": "started", "fingerprint": fingerprint, "created_at": now}
+
+
+def _existing(record, fingerprint, now):
+    """The stored response for a duplicate key, or None if the caller may
+    take over a stale claim. Raises KeyConflict otherwise."""
+    if record is None:
+        return None
+    if record["fingerprint"] != fingerprint:
+        raise KeyConflict("Idempotency-Key was already used for a different request", 422)
+    if record["state"] == "done":
+        return record["response"]
+    if record["created_at"] > now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS):
+        raise KeyConflict("A request with this Idempotency-Key is still in progress", 409)
+    return None
+
+
+def begin(db, key_id, fingerprint):
+    """Steps (core.flow) claiming a key. Returns None if the caller should
+    run the request, or the stored response ({"status", "body", "mimetype"})
+    to replay."""
+    now = datetime.utcnow()
+    try:
+        yield lambda: db.idempotency_keys.insert_one(_claim(now, key_id, fingerprint))
+        return None
+    except DuplicateKeyError:
+        record = yield lambda: db.idempotency_keys.find_one({"_id": key_id})
+    stored = _existing(record, fingerprint, now)
+    if stored is not None:
+        return stored
+    # Take over a stale claim; if someone else already did, they win
+    taken = yield lambda: db.idempotency_keys.update_one(
+        {"_id": key_id, "state": "started", "created_at": record["created_at"]}, {"$set": {"created_at": now}})
+    if not taken.modified_count:
+        raise KeyConflict("A request with this Idempotency-Key is still in progress", 409)
+    return None
+
+
+def finish(db, key_id, response):
+    """Store the response, or drop the claim after a server error so the
+    request can be retried."""
+    if response["status"] >= 500:
+        yield lambda: db.idempotency_keys.delete_one({"_id": key_id})
+    else:
+        yield lambda: db.idempotency_keys.update_one({"_id": key_id},
+                                                     {"$set": {"state": "done", "response": response}})
+
+
+def _key_id(identity, key):
+    if len(key) > MAX_KEY_LENGTH:
+        raise KeyConflict(f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters", 400)
+    return f"{identity}:{key}"
+
+
+def _replay(response_class, stored):
+    response = response_class(stored["body"], status=stored["status"], mimetype=stored["mimetype"])
+    response.headers[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _keyed_write(db, identity, key, fingerprint, respond, jsonify, response_class):
+    """Steps for a write sent with a key: claim it, then replay the stored
+    response or run the view (respond) and store what it returned."""
+    try:
+        key_id = _key_id(identity, key)
+        stored = yield from begin(db, key_id, fingerprint)
+    except KeyConflict as e:
+        return jsonify({"error": str(e)}), e.status
+    if stored is not None:
+        return _replay(response_class, stored)
+    try:
+        response = yield respond
+    except Exception:
+        yield lambda: db.idempotency_keys.delete_one({"_id": key_id})
+        raise
+    body = yield lambda: response.get_data(as_text=True)
+    yield from finish(db, key_id, {"status": response.status_code, "body": body, "mimetype": response.mimetype})
+    return response
+
+
+def idempotent(get_db, identity):
+    """Decorator for Flask write views (below @jwt_required). `get_db`
+    returns the database, `identity` the caller the key is scoped to."""
+    from flask import current_app, jsonify, request
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view(*args, **kwargs)
+            return run(_keyed_write(get_db(), identity(), key,
+                                    _fingerprint(request.method, request.full_path, request.get_data()),
+                                    lambda: current_app.make_response(view(*args, **kwargs)),
+                                    jsonify, current_app.response_class))
+        return wrapper
+    return decorator
+
+
+def idempotent_async(get_db, identity):
+    """idempotent for the Quart app."""
+    from quart import current_app, jsonify, request
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return await view(*args, **kwargs)
+
+            async def respond():
+                return await current_app.make_response(await view(*args, **kwargs))
+
+            return await run_async(_keyed_write(get_db(), identity(), key,
+                                                _fingerprint(request.method, request.full_path,
+                                                             await request.get_data()),
+                                                respond, jsonify, current_app.response_class))
+        return wrapper
+    return decorator
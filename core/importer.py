@@ -0,0 +1,241 @@
+import codecs
+import json
+import time
+from datetime import datetime
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from core.etags import bump
+from core.flow import run
+from core.search import search_fields
+
+# Upsert key for catalogue imports; rows without it are plain inserts
+EXTERNAL_KEY = "external_id"
+
+MAX_REPORTED_ERRORS = 100
+
+# A single record larger than this is treated as malformed input
+MAX_RECORD_CHARS = 16 * 1024 * 1024
+
+# Bytes read from the request body or file per parse step
+CHUNK_SIZE = 65536
+
+
+class MalformedInput(ValueError):
+    """The stream stopped parsing; `line` is where the bad record starts (1-based)."""
+
+    def __init__(self, message, line):
+        super().__init__(f"{message} (line {line})")
+        self.line = line
+
+
+class RecordParser:
+    """Incremental JSON array / NDJSON parser fed one chunk at a time, so
+    only the current chunk and a partial record are held in memory."""
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._in_array = None
+        self._line = 1  # line the buffer starts on
+        self.done = False
+        self.error = None
+
+    def feed(self, chunk):
+        """Parse a bytes/str chunk (empty at the end of the input) and return
+        the records it completes. Sets `done` when the input is finished,
+        and `error` (MalformedInput) if it stopped parsing."""
+        eof = not chunk
+        if isinstance(chunk, bytes):
+            chunk = self._utf8.decode(chunk, final=eof)
+        buffer = self._buffer + chunk
+        records, pos = [], 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) and self._in_array is None:
+                self._in_array = buffer[pos] == "["
+                pos += self._in_array
+                continue
+            if pos < len(buffer) and buffer[pos] == "]" and self._in_array:
+                self.done = True
+                return records
+            try:
+                record, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    if buffer[pos:].strip() or self._in_array:
+                        # Report the line the unparseable record starts on
+                        self._fail("Truncated or malformed JSON input", self._line + buffer.count("\n", 0, pos))
+                    self.done = True
+                    return records
+                break
+            if end == len(buffer) and not eof:
+                break  # a number/literal may continue in the next chunk
+            records.append(record)
+            pos = end
+        self._line += buffer.count("\n", 0, pos)
+        self._buffer = buffer[pos:]
+        if len(self._buffer) > MAX_RECORD_CHARS:
+            self._fail("Malformed JSON input (record too large)", self._line)
+        return records
+
+    def _fail(self, message, line):
+        self.error = MalformedInput(message, line)
+        self.done = True
+
+
+def iter_records(stream, chunk_size=CHUNK_SIZE):
+    """Yield JSON objects from a JSON array or NDJSON byte/text stream.
+    Raises MalformedInput once the stream stops parsing."""
+    parser = RecordParser()
+    while not parser.done:
+        yield from parser.feed(stream.read(chunk_size))
+    if parser.error:
+        raise parser.error
+
+
+def _number(raw, field, cast, default):
+    value = raw.get(field, default)
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number")
+    if value < 0:
+        raise ValueError(f"{field} must not be negative")
+    return value
+
+
+def _location(raw):
+    """Accept GeoJSON points or lat/lon pairs and return a GeoJSON Point."""
+    location = raw.get("location") or {}
+    if not isinstance(location, dict):
+        raise ValueError("location must be an object")
+    if "coordinates" in location:
+        coords = location["coordinates"]
+        if not isinstance(coords, (list, tuple)) or len(coords) != 2:
+            raise ValueError("location.coordinates must be [lon, lat]")
+        lon, lat = coords
+    else:
+        lat = location.get("lat", location.get("latitude", raw.get("lat")))
+        lon = location.get("lon", location.get("longitude", raw.get("lon")))
+        if lat is None and lon is None:
+            return {k: v for k, v in location.items() if k == "name"}
+    try:
+        lon, lat = float(lon), float(lat)
+    except (TypeError, ValueError):
+        raise ValueError("location coordinates must be numbers")
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        raise ValueError("location coordinates out of range")
+    point = {"type": "Point", "coordinates": [lon, lat]}
+    if location.get("name"):
+        point["name"] = str(location["name"])
+    return point
+
+
+def normalize_event(raw):
+    """Validate an imported row and shape it like events created via the API."""
+    if not isinstance(raw, dict):
+        raise ValueError("row must be an object")
+    if not raw.get("name") or not raw.get("date"):
+        raise ValueError("name and date are required")
+    tags = raw.get("tags") or []
+    if not isinstance(tags, list):
+        raise ValueError("tags must be a list")
+
+    event = {
+        "name": str(raw["name"]),
+        "description": str(raw.get("description", "")),
+        "category": str(raw.get("category") or "General"),
+        "city": str(raw.get("city", "")),
+        "price": _number(raw, "price", float, 0),
+        "available_seats": _number(raw, "available_seats", int, 100),
+        "tags": [str(t) for t in tags],
+        "location": _location(raw),
+        "date": str(raw["date"]),
+        "created_at": raw.get("created_at") or datetime.utcnow().isoformat(),
+    }
+    if raw.get(EXTERNAL_KEY) is not None:
+        event[EXTERNAL_KEY] = str(raw[EXTERNAL_KEY])
+    event["search"] = search_fields(event)
+    return event
+
+
+def _write(db, ops, rows, batch_no, report):
+    try:
+        result = yield lambda: db.events.bulk_write(ops, ordered=False)
+        details = None
+    except BulkWriteError as e:
+        result, details = None, e.details
+    counts = details or {
+        "nInserted": result.inserted_count, "nUpserted": result.upserted_count,
+        "nMatched": result.matched_count,
+    }
+    report["inserted"] += counts.get("nInserted", 0)
+    report["upserted"] += counts.get("nUpserted", 0)
+    report["updated"] += counts.get("nMatched", 0)
+    for error in (details or {}).get("writeErrors", []):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": rows[error["index"]], "batch": batch_no, "error": error.get("errmsg")})
+
+
+def import_stream(db, read, batch_size=1000, progress=None):
+    """Steps (core.flow) validating and writing events in bulk_write batches.
+
+    `read` is an op returning the next chunk of a JSON array or NDJSON
+    body, empty at the end. Rows with an external_id are upserted by it
+    (rating aggregates are only initialised on insert); other rows are
+    inserted. Returns a report with counts, rows/sec and up to
+    MAX_REPORTED_ERRORS row errors. If the input stops parsing, the rows
+    read so far are still written and the report gets "error" and "line"
+    for where it stopped.
+    """
+    report = {"rows": 0, "inserted": 0, "upserted": 0, "updated": 0, "invalid": 0, "failed": 0, "errors": []}
+    started = time.perf_counter()
+    ops, rows, batch_no = [], [], 0
+    on_insert = {"review_count": 0, "avg_rating": None}
+    parser = RecordParser()
+
+    while not parser.done:
+        for raw in parser.feed((yield read)):
+            report["rows"] += 1
+            row = report["rows"]
+            try:
+                event = normalize_event(raw)
+            except ValueError as e:
+                report["invalid"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    report["errors"].append({"row": row, "error": str(e)})
+                continue
+            if EXTERNAL_KEY in event:
+                ops.append(UpdateOne({EXTERNAL_KEY: event[EXTERNAL_KEY]},
+                                     bump({"$set": event, "$setOnInsert": on_insert}), upsert=True))
+            else:
+                ops.append(InsertOne({**event, **on_insert, "version": 1, "updated_at": datetime.utcnow()}))
+            rows.append(row)
+
+            if len(ops) >= batch_size:
+                batch_no += 1
+                yield from _write(db, ops, rows, batch_no, report)
+                ops, rows = [], []
+                if progress:
+                    elapsed = time.perf_counter() - started
+                    progress(f"  batch {batch_no}: {report['rows']} rows ({report['rows'] / elapsed:.0f} rows/sec)")
+
+    if ops:
+        batch_no += 1
+        yield from _write(db, ops, rows, batch_no, report)
+    if parser.error:
+        report["error"], report["line"] = str(parser.error), parser.error.line
+
+    elapsed = time.perf_counter() - started
+    report["batches"] = batch_no
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_sec"] = round(report["rows"] / elapsed) if elapsed else report["rows"]
+    return report
+
+
+def import_events(db, stream, batch_size=1000, progress=None, chunk_size=CHUNK_SIZE):
+    """import_stream() over a sync file-like stream (CLI, Flask)."""
+    return run(import_stream(db, lambda: stream.read(chunk_size), batch_size, progress))
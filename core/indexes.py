@@ -0,0 +1,118 @@
+import time
+from pymongo.errors import PyMongoError
+from core.idempotency import IDEMPOTENCY_TTL
+from core.pagination import SORTABLE_FIELDS
+from core.search import SEARCH_FIELDS
+
+# Unique partial index that rejects a second confirmed booking for the same
+# user and event (core.reservations falls back to a lookup without it)
+UNIQUE_BOOKINGS = "user_event_confirmed_unique"
+
+# Declarative index registry: collection -> list of index specs.
+# Every spec has a stable name so drift can be detected by name.
+INDEXES = {
+    "events": [
+        {"name": "location_2dsphere", "keys": [("location", "2dsphere")]},
+        {"name": "external_id_unique", "keys": [("external_id", 1)], "unique": True,
+         "partialFilterExpression": {"external_id": {"$type": "string"}}},
+        {"name": "events_text", "keys": [("name", "text"), ("description", "text"), ("tags", "text")],
+         "weights": {"name": 10, "tags": 5, "description": 1}},
+    ] + [
+        {"name": f"{field}_id_sort", "keys": [(field, 1), ("_id", 1)]}
+        for field in SORTABLE_FIELDS
+    ] + [
+        {"name": f"search_{param}_prefix", "keys": [(f"search.{param}", 1)]}
+        for param in SEARCH_FIELDS
+    ],
+    "bookings": [
+        {"name": "user_status", "keys": [("user_id", 1), ("status", 1)]},
+        {"name": "user_event_status", "keys": [("user_id", 1), ("event_id", 1), ("status", 1)]},
+        # One confirmed booking per user and event
+        {"name": UNIQUE_BOOKINGS, "keys": [("user_id", 1), ("event_id", 1)],
+         "unique": True, "partialFilterExpression": {"status": "confirmed"}},
+    ],
+    "reviews": [
+        {"name": "event_id_sort", "keys": [("event_id", 1), ("_id", -1)]},
+    ],
+    "users": [
+        {"name": "username_unique", "keys": [("username", 1)], "unique": True},
+    ],
+    "seat_shards": [
+        {"name": "event_shard_unique", "keys": [("event_id", 1), ("shard", 1)], "unique": True},
+    ],
+    "idempotency_keys": [
+        {"name": "created_at_ttl", "keys": [("created_at", 1)], "expireAfterSeconds": IDEMPOTENCY_TTL},
+    ],
+}
+
+# Options compared when checking an existing index against its spec
+COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds", "weights")
+
+
+def _options(spec):
+    return {k: spec[k] for k in COMPARED_OPTIONS if k in spec}
+
+
+def _key_signature(keys):
+    """Index keys as the server reports them (text fields fold into _fts/_ftsx)."""
+    keys = [(field, direction) for field, direction in keys]
+    if any(direction == "text" for _, direction in keys):
+        keys = [k for k in keys if k[1] != "text"] + [("_fts", "text"), ("_ftsx", 1)]
+    return keys
+
+
+def _matches(spec, info):
+    return _key_signature(info["key"]) == _key_signature(spec["keys"]) and _options(spec) == _options(info)
+
+
+def _create(collection, spec):
+    started = time.perf_counter()
+    collection.create_index(spec["keys"], name=spec["name"], **_options(spec))
+    return round(time.perf_counter() - started, 3)
+
+
+def apply_indexes(db, create=True, fix_drift=False):
+    """Create missing registry indexes and report drift.
+
+    Returns one report row per index: status is "ok", "created", "missing"
+    (check-only run), "drift" (same name, different definition or same
+    keys under another name), "rebuilt", "extra" (not in the registry) or
+    "error". Build time in seconds is included for created/rebuilt rows.
+    """
+    report = []
+    for coll_name, specs in INDEXES.items():
+        collection = db[coll_name]
+        existing = collection.index_information()
+        declared = {spec["name"] for spec in specs}
+        dropped = set()
+
+        for spec in specs:
+            row = {"collection": coll_name, "name": spec["name"]}
+            info = existing.get(spec["name"])
+            same_keys = [name for name, other in existing.items()
+                         if name not in declared and _key_signature(other["key"]) == _key_signature(spec["keys"])]
+            try:
+                if info is not None and _matches(spec, info):
+                    row["status"] = "ok"
+                elif info is not None or same_keys:
+                    row["status"] = "drift"
+                    if fix_drift:
+                        for name in ([spec["name"]] if info is not None else []) + same_keys:
+                            collection.drop_index(name)
+                            dropped.add(name)
+                        row["seconds"] = _create(collection, spec)
+                        row["status"] = "rebuilt"
+                elif create:
+                    row["seconds"] = _create(collection, spec)
+                    row["status"] = "created"
+                else:
+                    row["status"] = "missing"
+            except PyMongoError as e:
+                row["status"] = "error"
+                row["error"] = str(e)
+            report.append(row)
+
+        for name in existing:
+            if name != "_id_" and name not in declared and name not in dropped:
+                report.append({"collection": coll_name, "name": name, "status": "extra"})
+    return report
@@ -0,0 +1,230 @@
+"""Sharded seat inventory for flash-sale events.
+
+Every booking normally decrements the event's own `available_seats`, so a
+hot on-sale event serializes on one document. A sharded event (marked with
+`seat_shards: N`) keeps its seats in N `seat_shards` counter documents
+instead; reservations pick a random shard with capacity and fall back to
+the others, so concurrent bookings mostly update different documents.
+
+The event's `available_seats` is then derived: GET /events/<id> reads it
+from the shards (with_available), stats refreshes sync it first
+(sync_all), and sync_available() rewrites it from the shard sum, which
+rebalance() does after evening the shards out again. Rebalances run from
+`flask --app app rebalance-seats` or every SEAT_REBALANCE_INTERVAL seconds
+(see app.py).
+"""
+import random
+import threading
+import time
+from pymongo import ReturnDocument
+from core.cache import MISSING, LRUCache, invalidate_event
+from core.etags import bump
+from core.flow import Many, run
+
+# Which events are sharded (event_id -> shard count). Only a hint: the
+# unsharded booking path excludes sharded events in its own filter.
+_shard_counts = LRUCache(maxsize=4096, ttl=60)
+
+
+def shard_count(event_id):
+    count = _shard_counts.get(event_id)
+    return None if count is MISSING else count
+
+
+def remember(event_id, shards):
+    _shard_counts.set(event_id, shards)
+
+
+def forget(event_id):
+    _shard_counts.delete(event_id)
+
+
+def _take(event_id, shard, ticket_count):
+    return ({"event_id": event_id, "shard": shard, "available": {"$gte": ticket_count}},
+            {"$inc": {"available": -ticket_count}})
+
+
+def _plan(docs, ticket_count):
+    """Shards to try in order: random ones that fit the whole booking first.
+    If none does, (doc, take) pairs that together cover it, largest first."""
+    fits = [doc for doc in docs if doc["available"] >= ticket_count]
+    random.shuffle(fits)
+    if fits:
+        return [[(doc, ticket_count)] for doc in fits]
+    if sum(doc["available"] for doc in docs) < ticket_count:
+        return []
+    split, need = [], ticket_count
+    for doc in sorted(docs, key=lambda d: -d["available"]):
+        if need <= 0:
+            break
+        if doc["available"] > 0:
+            split.append((doc, min(doc["available"], need)))
+            need -= split[-1][1]
+    return [split]
+
+
+def reserve(db, event_id, ticket_count, session=None):
+    """Steps (core.flow) taking seats from an event's shards. True if taken,
+    False if there are not enough, None if the event has no shards."""
+    shards = shard_count(event_id)
+    if shards:
+        result = yield lambda: db.seat_shards.update_one(*_take(event_id, random.randrange(shards), ticket_count),
+                                                         session=session)
+        if result.modified_count:
+            return True
+    docs = yield Many(lambda: db.seat_shards.find({"event_id": event_id}, {"available": 1}, session=session))
+    if not docs:
+        forget(event_id)
+        return None
+    remember(event_id, len(docs))
+    for attempt in _plan(docs, ticket_count):
+        taken = []
+        for doc, count in attempt:
+            result = yield lambda: db.seat_shards.update_one({"_id": doc["_id"], "available": {"$gte": count}},
+                                                             {"$inc": {"available": -count}}, session=session)
+            if not result.modified_count:
+                break
+            taken.append((doc, count))
+        else:
+            return True
+        # A shard ran dry under us; put back what this attempt took
+        for doc, count in taken:
+            yield lambda: db.seat_shards.update_one({"_id": doc["_id"]}, {"$inc": {"available": count}},
+                                                    session=session)
+    return False
+
+
+def release(db, event_id, ticket_count, session=None):
+    """Steps giving seats back to one of the event's shards. False if it has none."""
+    shards = shard_count(event_id)
+    query = {"event_id": event_id, "shard": random.randrange(shards)} if shards else {"event_id": event_id}
+    result = yield lambda: db.seat_shards.update_one(query, {"$inc": {"available": ticket_count}}, session=session)
+    if not result.matched_count and shards:
+        result = yield lambda: db.seat_shards.update_one({"event_id": event_id}, {"$inc": {"available": ticket_count}},
+                                                         session=session)
+    return result.matched_count > 0
+
+
+def available(db, event_id):
+    """Steps for the seats left on a sharded event: the sum of its shards."""
+    rows = yield Many(lambda: db.seat_shards.aggregate([{"$match": {"event_id": event_id}},
+                                                        {"$group": {"_id": None, "available": {"$sum": "$available"}}}]))
+    return rows[0]["available"] if rows else 0
+
+
+def with_available(db, event):
+    """Steps returning `event` with a sharded event's available_seats read
+    from its shards (the stored value lags until the next sync)."""
+    if event and event.get("seat_shards"):
+        event = {**event, "available_seats": (yield from available(db, event["_id"]))}
+    return event
+
+
+# Maintenance (sync only: CLI, background thread, benchmarks)
+
+def sync_available(db, event_id):
+    """Rewrite a sharded event's available_seats from its shards."""
+    total = run(available(db, event_id))
+    db.events.update_one({"_id": event_id, "seat_shards": {"$exists": True}, "available_seats": {"$ne": total}},
+                         bump({"$set": {"available_seats": total}}))
+    invalidate_event(event_id)
+    return total
+
+
+def sync_all(db):
+    """Sync available_seats on every sharded event."""
+    return [sync_available(db, event["_id"]) for event in db.events.find({"seat_shards": {"$exists": True}}, {"_id": 1})]
+
+
+def enable_sharding(db, event_id, shards):
+    """Split an event's seats across `shards` counters. Returns the seats
+    moved, or None if the event does not exist or is already sharded."""
+    # Flag first: from here on the unsharded path can no longer sell the
+    # seats that are about to move
+    event = db.events.find_one_and_update({"_id": event_id, "seat_shards": {"$exists": False}},
+                                          bump({"$set": {"seat_shards": shards}}),
+                                          projection={"available_seats": 1}, return_document=ReturnDocument.AFTER)
+    if event is None:
+        return None
+    seats = max(event.get("available_seats", 0), 0)
+    db.seat_shards.insert_many([{"event_id": event_id, "shard": i,
+                                 "available": seats // shards + (1 if i < seats % shards else 0)}
+                                for i in range(shards)])
+    remember(event_id, shards)
+    invalidate_event(event_id)
+    return seats
+
+
+def disable_sharding(db, event_id):
+    """Fold an event's shards back into its available_seats. Seats released
+    while it runs can be lost, so run it once the sale is over."""
+    total = 0
+    for doc in list(db.seat_shards.find({"event_id": event_id}, {"_id": 1})):
+        # Deleting shard by shard keeps each one's final count exact
+        drained = db.seat_shards.find_one_and_delete({"_id": doc["_id"]})
+        total += drained["available"] if drained else 0
+    db.events.update_one({"_id": event_id}, bump({"$set": {"available_seats": total}, "$unset": {"seat_shards": ""}}))
+    forget(event_id)
+    invalidate_event(event_id)
+    return total
+
+
+def rebalance(db, event_id, shards):
+    """Even out an event's shards (resizing to `shards`) and sync its
+    available_seats. Seats move with conditional $inc pairs, so bookings
+    keep running; a crash mid-move can only strand seats, not oversell."""
+    docs = list(db.seat_shards.find({"event_id": event_id}, {"shard": 1, "available": 1}))
+    existing = {doc["shard"] for doc in docs}
+    missing = [i for i in range(shards) if i not in existing]
+    if missing:
+        db.seat_shards.insert_many([{"event_id": event_id, "shard": i, "available": 0} for i in missing])
+        docs += list(db.seat_shards.find({"event_id": event_id, "shard": {"$in": missing}},
+                                         {"shard": 1, "available": 1}))
+
+    pool, moved, resized = 0, 0, bool(missing)
+    for doc in docs:
+        if doc["shard"] >= shards:
+            drained = db.seat_shards.find_one_and_delete({"_id": doc["_id"]})
+            pool += drained["available"] if drained else 0
+            resized = True
+    docs = [doc for doc in docs if doc["shard"] < shards]
+    total = pool + sum(doc["available"] for doc in docs)
+    target = {doc["shard"]: total // shards + (1 if doc["shard"] < total % shards else 0) for doc in docs}
+
+    for doc in docs:
+        surplus = doc["available"] - target[doc["shard"]]
+        if surplus > 0 and db.seat_shards.update_one({"_id": doc["_id"], "available": {"$gte": surplus}},
+                                                     {"$inc": {"available": -surplus}}).modified_count:
+            pool += surplus
+            moved += surplus
+    for doc in docs:
+        deficit = min(target[doc["shard"]] - doc["available"], pool)
+        if deficit > 0:
+            db.seat_shards.update_one({"_id": doc["_id"]}, {"$inc": {"available": deficit}})
+            pool -= deficit
+    if pool:
+        db.seat_shards.update_one({"event_id": event_id, "shard": 0}, {"$inc": {"available": pool}})
+
+    if resized:
+        db.events.update_one({"_id": event_id}, {"$set": {"seat_shards": shards}})
+        forget(event_id)
+    return {"event_id": event_id, "shards": shards, "moved": moved, "available_seats": sync_available(db, event_id)}
+
+
+def rebalance_all(db):
+    """Rebalance every sharded event to its configured shard count."""
+    return [rebalance(db, event["_id"], event["seat_shards"])
+            for event in db.events.find({"seat_shards": {"$exists": True}}, {"seat_shards": 1})]
+
+
+def start_rebalancer(app, db_getter, interval):
+    """Run rebalance_all every `interval` seconds in a daemon thread."""
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                rebalance_all(db_getter())
+            except Exception as e:
+                app.logger.warning("Seat rebalance failed: %s", e)
+
+    threading.Thread(target=loop, daemon=True).start()
@@ -0,0 +1,60 @@
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from bson import ObjectId, Decimal128
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional fast path
+    orjson = None
+
+
+def mongo_default(obj):
+    """Encode the BSON types our documents carry."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal128):
+        return str(obj.to_decimal())
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class MongoJSONProvider(DefaultJSONProvider):
+    """App-wide JSON provider that serializes Mongo documents as-is.
+
+    ObjectId becomes its hex string, datetimes ISO 8601 and Decimal128 a
+    decimal string, so routes can return documents straight from PyMongo.
+    Uses orjson when installed (disable with JSON_USE_ORJSON=0).
+    """
+
+    default = staticmethod(mongo_default)
+    use_orjson = orjson is not None and os.getenv("JSON_USE_ORJSON", "1") != "0"
+
+    def _orjson_options(self):
+        return orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.dumps(obj, default=mongo_default, option=self._orjson_options()).decode("utf-8")
+        return super().dumps(obj, **kwargs)
+
+    def dumps_bytes(self, obj):
+        """Encoded body for responses and streams (skips the str round trip with orjson)."""
+        if self.use_orjson:
+            return orjson.dumps(obj, default=mongo_default, option=self._orjson_options())
+        return super().dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
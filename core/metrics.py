@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import g, has_request_context, request
+from pymongo import monitoring
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Requests slower than this are logged with their Mongo command breakdown
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COMMAND_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition layout."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {total}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {total}"
+
+
+class Metrics:
+    """Process-wide request/database counters rendered for /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}      # (method, route, status) -> count
+        self.latency = {}       # (method, route) -> Histogram (seconds)
+        self.db_calls = {}      # (method, route) -> Histogram (commands per request)
+        self.response_bytes = {}  # (method, route) -> Histogram
+        self.commands = {}      # (command, collection) -> [count, seconds, failures]
+
+    def record_request(self, method, route, status, seconds, commands, size):
+        key = (method, route)
+        with self._lock:
+            self.requests[key + (status,)] = self.requests.get(key + (status,), 0) + 1
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.db_calls.setdefault(key, Histogram(COMMAND_BUCKETS)).observe(len(commands))
+            if size is not None:
+                self.response_bytes.setdefault(key, Histogram(BYTES_BUCKETS)).observe(size)
+
+    def record_command(self, name, collection, seconds, failed=False):
+        with self._lock:
+            entry = self.commands.setdefault((name, collection), [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += failed
+
+    def render(self, cache_stats=None, pool_stats=None):
+        """Prometheus text exposition (format 0.0.4)."""
+        out = []
+        with self._lock:
+            out.append("# TYPE eventmate_http_requests_total counter")
+            for (method, route, status), n in sorted(self.requests.items()):
+                out.append(f'eventmate_http_requests_total{{method="{method}",route="{route}",status="{status}"}} {n}')
+            for name, series in (
+                ("eventmate_http_request_duration_seconds", self.latency),
+                ("eventmate_mongo_commands_per_request", self.db_calls),
+                ("eventmate_http_response_bytes", self.response_bytes),
+            ):
+                out.append(f"# TYPE {name} histogram")
+                for (method, route), hist in sorted(series.items()):
+                    out.extend(hist.lines(name, f'method="{method}",route="{route}"'))
+            out.append("# TYPE eventmate_mongo_commands_total counter")
+            out.append("# TYPE eventmate_mongo_command_seconds_total counter")
+            out.append("# TYPE eventmate_mongo_command_failures_total counter")
+            for (command, collection), (n, seconds, failures) in sorted(self.commands.items()):
+                labels = f'command="{command}",collection="{collection}"'
+                out.append(f"eventmate_mongo_commands_total{{{labels}}} {n}")
+                out.append(f"eventmate_mongo_command_seconds_total{{{labels}}} {seconds}")
+                out.append(f"eventmate_mongo_command_failures_total{{{labels}}} {failures}")
+        for prefix, stats in (("cache", cache_stats), ("mongo_pool", pool_stats)):
+            for field, value in (stats or {}).items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    out.append(f"eventmate_{prefix}_{field} {value}")
+        return "\n".join(out) + "\n"
+
+
+metrics = Metrics()
+
+
+class CommandListener(monitoring.CommandListener):
+    """Times every Mongo command and attributes it to the current request.
+
+    PyMongo fires these callbacks on the thread issuing the command, so a
+    request context is available whenever the command came from a view.
+    """
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ""
+        self._pending[event.request_id, event.operation_id] = collection
+
+    def _finish(self, event, failed):
+        collection = self._pending.pop((event.request_id, event.operation_id), "")
+        seconds = event.duration_micros / 1e6
+        metrics.record_command(event.command_name, collection, seconds, failed)
+        if has_request_context() and "mongo_commands" in g:
+            g.mongo_commands.append((event.command_name, collection, seconds))
+
+    def succeeded(self, event):
+        self._finish(event, False)
+
+    def failed(self, event):
+        self._finish(event, True)
+
+
+command_listener = CommandListener()
+
+
+def init_metrics(app):
+    """Install the request hooks that feed `metrics` and the slow-request log."""
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+        g.mongo_commands = []
+
+    @app.after_request
+    def record(response):
+        if "request_started" not in g:
+            return response
+        seconds = time.perf_counter() - g.request_started
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        commands = g.mongo_commands
+        # Streamed bodies have no length and keep querying after this hook
+        size = None if response.is_streamed else response.content_length
+        metrics.record_request(request.method, route, response.status_code, seconds, commands, size)
+
+        db_seconds = sum(c[2] for c in commands)
+        response.headers["Server-Timing"] = (
+            f'db;dur={db_seconds * 1000:.1f};desc="{len(commands)} queries", app;dur={seconds * 1000:.1f}'
+        )
+        if seconds * 1000 >= SLOW_REQUEST_MS:
+            breakdown = ", ".join(f"{name} {coll} {s * 1000:.1f}ms" if coll else f"{name} {s * 1000:.1f}ms"
+                                  for name, coll, s in commands)
+            app.logger.warning("Slow request %s %s: %.1fms, %d mongo commands (%.1fms)%s",
+                               request.method, request.path, seconds * 1000, len(commands),
+                               db_seconds * 1000, f": {breakdown}" if breakdown else "")
+        return response
@@ -0,0 +1,98 @@
+import hashlib
+import time
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+
+def _review_id(event_id, index, review):
+    """Keep existing ids; derive a stable one otherwise so reruns are idempotent.
+
+    Derived ids reuse the event's timestamp bytes so migrated reviews sort
+    before anything written after the event was created.
+    """
+    if ObjectId.is_valid(review.get("_id")):
+        return ObjectId(review["_id"])
+    digest = hashlib.md5(f"{event_id}:{index}".encode("utf-8")).digest()
+    return ObjectId(event_id.binary[:4] + digest[:8])
+
+
+def migrate_embedded_reviews(db, batch_size=500, progress=print):
+    """Move events.reviews arrays into the reviews collection.
+
+    Reviews are upserted by _id and the array is only unset after its
+    batch is written, so the migration can be interrupted and rerun.
+    """
+    started = time.perf_counter()
+    events_done = reviews_done = 0
+    ops, event_ids = [], []
+
+    def flush():
+        nonlocal events_done, reviews_done
+        if ops:
+            db.reviews.bulk_write(ops, ordered=False)
+        db.events.update_many({"_id": {"$in": event_ids}}, {"$unset": {"reviews": ""}})
+        events_done += len(event_ids)
+        reviews_done += len(ops)
+        ops.clear()
+        event_ids.clear()
+        progress(f"  {events_done} events, {reviews_done} reviews migrated "
+                 f"({time.perf_counter() - started:.1f}s)")
+
+    cursor = db.events.find({"reviews": {"$exists": True}}, {"reviews": 1}).batch_size(batch_size)
+    for event in cursor:
+        for index, review in enumerate(event.get("reviews") or []):
+            doc = dict(review, event_id=event["_id"])
+            doc["_id"] = _review_id(event["_id"], index, review)
+            ops.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+        event_ids.append(event["_id"])
+        if len(ops) >= batch_size or len(event_ids) >= batch_size:
+            flush()
+    if event_ids:
+        flush()
+    return {"events": events_done, "reviews": reviews_done}
+
+
+def migrate_booking_user_ids(db, batch_size=1000, progress=print):
+    """Rewrite string bookings.user_id values as ObjectIds.
+
+    Each update is guarded on the old value, so the migration can run while
+    the app is serving and be rerun until nothing is left. A converted row
+    that collides with an existing confirmed booking for the same user and
+    event (the duplicates the mixed types used to hide) is left as is and
+    reported in `conflicts` for manual review.
+    """
+    started = time.perf_counter()
+    converted, invalid, conflicts = 0, [], []
+    ops, ids = [], []
+
+    def flush():
+        nonlocal converted
+        try:
+            result = db.bookings.bulk_write(ops, ordered=False)
+            converted += result.modified_count
+        except BulkWriteError as e:
+            converted += e.details.get("nModified", 0)
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") != 11000:
+                    raise
+                conflicts.append(ids[error["index"]])
+        ops.clear()
+        ids.clear()
+        progress(f"  {converted} bookings converted, {len(conflicts)} conflicts "
+                 f"({time.perf_counter() - started:.1f}s)")
+
+    cursor = db.bookings.find({"user_id": {"$type": "string"}}, {"user_id": 1}).batch_size(batch_size)
+    for booking in cursor:
+        user_id = booking["user_id"]
+        if not ObjectId.is_valid(user_id):
+            invalid.append(booking["_id"])
+            continue
+        ops.append(UpdateOne({"_id": booking["_id"], "user_id": user_id},
+                             {"$set": {"user_id": ObjectId(user_id)}}))
+        ids.append(booking["_id"])
+        if len(ops) >= batch_size:
+            flush()
+    if ops:
+        flush()
+    return {"converted": converted, "conflicts": conflicts, "invalid": invalid}
@@ -0,0 +1,75 @@
+import base64
+import binascii
+from urllib.parse import urlencode
+from bson import json_util
+
+# Fields clients may sort event listings by. Each one is backed by a
+# compound (field, _id) index so keyset pages stay index-only walks.
+SORTABLE_FIELDS = ("date", "price", "name", "created_at", "avg_rating", "review_count")
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def parse_limit(value, default=DEFAULT_LIMIT):
+    """Clamp a client supplied page size to 1..MAX_LIMIT."""
+    limit = int(value) if value not in (None, "") else default
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def parse_order(value):
+    """Map ?order=asc|desc to a sort direction."""
+    if value in (None, "", "asc"):
+        return 1
+    if value == "desc":
+        return -1
+    raise ValueError("order must be 'asc' or 'desc'")
+
+
+def sort_spec(field, direction=1):
+    """Compound sort with _id as tie-breaker so the order is total."""
+    return [(field, direction), ("_id", direction)]
+
+
+def next_link(args, **params):
+    """Link header value for the next page of a plain-list response: the
+    request's query string with `params` replaced, relative to its URL."""
+    return f'<?{urlencode({**args.to_dict(), **params})}>; rel="next"'
+
+
+def encode_cursor(doc, field, direction=1):
+    """Opaque cursor holding the last document's sort key and _id."""
+    raw = json_util.dumps([field, direction, doc.get(field), doc["_id"]])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, field, direction=1):
+    """Return (value, _id) from a cursor issued for the same sort."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_field, cursor_direction, value, last_id = json_util.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        raise CursorError("Invalid cursor")
+    if (cursor_field, cursor_direction) != (field, direction):
+        raise CursorError("Cursor was issued for a different sort order")
+    return value, last_id
+
+
+def keyset_filter(field, value, last_id, direction=1):
+    """Filter selecting documents strictly after (value, last_id)."""
+    op = "$gt" if direction == 1 else "$lt"
+    if value is None:
+        # Missing/null keys sort lowest; $gt/$lt never match across types.
+        tail = {field: None, "_id": {op: last_id}}
+        return {"$or": [{field: {"$ne": None}}, tail]} if direction == 1 else tail
+    branches = [
+        {field: {op: value}},
+        {field: value, "_id": {op: last_id}},
+    ]
+    if direction == -1:
+        branches.append({field: None})
+    return {"$or": branches}
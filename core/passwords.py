@@ -0,0 +1,105 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Any werkzeug method string, e.g. "scrypt:16384:8:1" or "pbkdf2:sha256:600000".
+# Stored hashes made with other parameters are upgraded on the next login.
+HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+SALT_LENGTH = int(os.getenv("PASSWORD_SALT_LENGTH", 16))
+
+# Optional bounded pool for hashing (0 = hash on the request thread).
+# Hashing releases the GIL, so threads run in parallel; "process" avoids
+# sharing the interpreter at the cost of pickling each call. The sync path
+# still waits on .result(), so a Flask worker thread stays blocked for the
+# whole hash either way; the pool bounds concurrent hashing (and sheds load
+# via HashPoolBusy) rather than freeing request threads. Only the async
+# path yields the event loop while it waits.
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 0))
+HASH_POOL = os.getenv("PASSWORD_HASH_POOL", "thread")
+# Hash jobs allowed to wait for a worker before new ones are refused
+HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 32))
+
+
+class HashPoolBusy(Exception):
+    """The hash pool queue is full; the caller should answer 503."""
+
+
+def _method_prefix(method):
+    # Normalise shorthands ("scrypt", "pbkdf2") to what hashes actually store
+    return generate_password_hash("", method=method, salt_length=1).split("$", 1)[0]
+
+
+CURRENT_PREFIX = _method_prefix(HASH_METHOD)
+
+_pool = None
+_slots = None
+_pool_guard = threading.Lock()
+hashes_computed = 0
+
+
+def _executor():
+    global _pool, _slots
+    if HASH_WORKERS <= 0:
+        return None
+    with _pool_guard:
+        if _pool is None:
+            pool_class = ProcessPoolExecutor if HASH_POOL == "process" else ThreadPoolExecutor
+            _pool = pool_class(max_workers=HASH_WORKERS)
+            _slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE)
+    return _pool
+
+
+def _run(fn, *args):
+    global hashes_computed
+    pool = _executor()
+    if pool is None:
+        hashes_computed += 1
+        return fn(*args)
+    if not _slots.acquire(blocking=False):
+        raise HashPoolBusy("Too many logins in progress, try again shortly")
+    hashes_computed += 1
+    try:
+        return pool.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+async def _run_async(fn, *args):
+    global hashes_computed
+    pool = _executor()
+    if pool is None:
+        hashes_computed += 1
+        return await asyncio.to_thread(fn, *args)
+    if not _slots.acquire(blocking=False):
+        raise HashPoolBusy("Too many logins in progress, try again shortly")
+    hashes_computed += 1
+    try:
+        return await asyncio.wrap_future(pool.submit(fn, *args))
+    finally:
+        _slots.release()
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, HASH_METHOD, SALT_LENGTH)
+
+
+def verify_password(stored, password):
+    return _run(check_password_hash, stored, password)
+
+
+async def hash_password_async(password):
+    return await _run_async(generate_password_hash, password, HASH_METHOD, SALT_LENGTH)
+
+
+async def verify_password_async(stored, password):
+    return await _run_async(check_password_hash, stored, password)
+
+
+def needs_rehash(stored):
+    """True if a stored hash was made with other parameters than HASH_METHOD."""
+    return stored.split("$", 1)[0] != CURRENT_PREFIX
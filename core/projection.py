@@ -0,0 +1,33 @@
+# Fields clients may request with ?fields= on event listings
+EVENT_FIELDS = (
+    "name", "description", "category", "city", "date", "price", "available_seats",
+    "tags", "location", "created_at", "avg_rating", "review_count", "rating_hist",
+)
+
+# Named field sets for ?view=
+VIEWS = {
+    "card": ("name", "category", "city", "date", "price", "available_seats", "avg_rating", "review_count"),
+    "detail": EVENT_FIELDS,
+}
+
+
+def event_projection(args, include=()):
+    """Build a MongoDB projection from ?fields= or ?view=.
+
+    Returns None when neither is given (full document). `include` adds
+    fields the caller needs internally, e.g. the sort key for cursors.
+    Raises ValueError for unknown fields or views.
+    """
+    if args.get("fields"):
+        fields = [f.strip() for f in args["fields"].split(",") if f.strip()]
+        unknown = [f for f in fields if f not in EVENT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    elif args.get("view"):
+        if args["view"] not in VIEWS:
+            raise ValueError(f"view must be one of: {', '.join(VIEWS)}")
+        fields = VIEWS[args["view"]]
+    else:
+        return None
+
+    return {field: 1 for field in (*fields, *include)}
@@ -0,0 +1,351 @@
+"""Request parsing and query building shared by the Flask and ASGI apps.
+
+Everything here is I/O free: functions take request args / JSON bodies and
+return MongoDB filters, documents and response bodies, raising ValueError
+for bad input. routes/ and async_routes/ only run the queries.
+"""
+from collections import namedtuple
+from datetime import date, datetime
+from urllib.parse import urlencode
+from bson import ObjectId
+from core.etags import bump
+from core.geo import NEARBY_GEOHASH_PRECISION, geohash, cell_center
+from core.pagination import (
+    SORTABLE_FIELDS, MAX_LIMIT, parse_limit, parse_order, sort_spec,
+    encode_cursor, decode_cursor, keyset_filter,
+)
+from core.projection import event_projection
+from core.ratings import parse_rating
+from core.search import (
+    SEARCH_FIELDS, HIDDEN_FIELDS, TEXT_SCORE, search_fields, search_updates,
+    prefix_filter, regex_filter, text_filter,
+)
+
+SEARCH_PAGE_SIZE = 20
+REVIEWS_PAGE_SIZE = 20
+
+# A parsed listing request. `fetch` is the limit to send to MongoDB (one
+# extra row in cursor mode to detect a next page); sort may be None.
+Listing = namedtuple("Listing", "query projection sort skip limit fetch paged sort_field direction")
+
+# A parsed nearby request: the $geoNear pipeline and the cache key for its
+# geohash cell (None when the cell cache is disabled).
+Nearby = namedtuple("Nearby", "pipeline limit paged cache_key")
+
+
+def parse_sort(args):
+    """Read ?sort= and ?order= into (field, direction); raises ValueError."""
+    sort_field = args.get("sort", "date")
+    if sort_field not in SORTABLE_FIELDS:
+        raise ValueError(f"sort must be one of: {', '.join(SORTABLE_FIELDS)}")
+    return sort_field, parse_order(args.get("order"))
+
+
+def rating_filter(args, query):
+    """Apply ?min_rating= against the maintained avg_rating field."""
+    min_rating = args.get("min_rating")
+    if min_rating:
+        query["avg_rating"] = {"$gte": float(min_rating)}
+    return query
+
+
+# EVENTS
+
+def event_listing(args):
+    """GET /events: legacy ?page= or keyset ?cursor= pagination."""
+    limit = parse_limit(args.get("limit"))
+    page = int(args.get("page", 1))
+    sort_field, direction = parse_sort(args)
+    query = rating_filter(args, {})
+    projection = event_projection(args, include=(sort_field,)) or HIDDEN_FIELDS
+
+    if "cursor" not in args:
+        # One extra row tells the handler whether to send a next-page Link
+        skip = (max(page, 1) - 1) * limit
+        return Listing(query, projection, sort_spec(sort_field, direction), skip, limit, limit + 1,
+                       False, sort_field, direction)
+
+    if args["cursor"]:
+        value, last_id = decode_cursor(args["cursor"], sort_field, direction)
+        query.update(keyset_filter(sort_field, value, last_id, direction))
+    # Fetch one extra row to know whether another page exists
+    return Listing(query, projection, sort_spec(sort_field, direction), 0, limit, limit + 1,
+                   True, sort_field, direction)
+
+
+def listing_body(listing, events):
+    """Response body for event_listing: a list, or an envelope in cursor mode."""
+    if not listing.paged:
+        return events[:listing.limit]
+    next_cursor = None
+    if len(events) > listing.limit:
+        events = events[:listing.limit]
+        next_cursor = encode_cursor(events[-1], listing.sort_field, listing.direction)
+    return {"events": events, "next_cursor": next_cursor}
+
+
+def event_search(args):
+    """GET /events/search: text, keyword prefix and price/rating filters."""
+    query = {}
+    q = args.get("q")
+    max_price = args.get("max_price")
+    field_filter = regex_filter if args.get("mode") == "regex" else prefix_filter
+
+    for param in SEARCH_FIELDS:
+        if args.get(param):
+            query.update(field_filter(param, args[param]))
+    projection = event_projection(args) or dict(HIDDEN_FIELDS)
+    if q:
+        query.update(text_filter(q))
+        projection["score"] = TEXT_SCORE
+    if max_price:
+        query["price"] = {"$lte": float(max_price)}
+    rating_filter(args, query)
+    limit = parse_limit(args.get("limit"), default=SEARCH_PAGE_SIZE)
+    page = max(int(args.get("page", 1)), 1)
+    sort = None
+    if "sort" in args:
+        sort = sort_spec(*parse_sort(args))
+    elif q:
+        sort = [("score", TEXT_SCORE)]
+    # One extra row tells the handler whether to send a next-page Link
+    return Listing(query, projection, sort, (page - 1) * limit, limit, limit + 1, False, None, None)
+
+
+def nearby_search(args):
+    """GET /events/nearby: $geoNear by distance with filters and keyset paging.
+
+    Results are ordered by (distance_km, _id) so events sharing a location
+    page deterministically. With the opt-in cell cache on, distances are
+    measured from the centre of the caller's geohash cell.
+    """
+    lat = args.get("lat")
+    lon = args.get("lon")
+    if not lat or not lon:
+        raise ValueError("Latitude and longitude required")
+    lat, lon = float(lat), float(lon)
+    radius = float(args.get("radius", 10)) * 1000  # km → meters
+    limit = parse_limit(args.get("limit"), default=MAX_LIMIT)
+    paged = "cursor" in args
+
+    query = {}
+    if args.get("category"):
+        query.update(prefix_filter("category", args["category"]))
+    if args.get("max_price"):
+        query["price"] = {"$lte": float(args["max_price"])}
+    dates = {}
+    for param, op in (("date_from", "$gte"), ("date_to", "$lte")):
+        if args.get(param):
+            # Dates are stored as YYYY-MM-DD strings, which sort correctly
+            try:
+                date.fromisoformat(args[param])
+            except ValueError:
+                raise ValueError(f"{param} must be a YYYY-MM-DD date")
+            dates[op] = args[param]
+    if dates:
+        query["date"] = dates
+    rating_filter(args, query)
+
+    cache_key = None
+    if NEARBY_GEOHASH_PRECISION > 0:
+        cell = geohash(lat, lon, NEARBY_GEOHASH_PRECISION)
+        lat, lon = cell_center(cell)
+        params = sorted((k, v) for k, v in args.items() if k not in ("lat", "lon"))
+        cache_key = f"nearby:{cell}:{urlencode(params)}"
+
+    geo_near = {
+        "near": {"type": "Point", "coordinates": [lon, lat]},
+        "distanceField": "distance_km",
+        "distanceMultiplier": 0.001,
+        "maxDistance": radius,
+        "spherical": True,
+        "query": query,
+    }
+    pipeline = [{"$geoNear": geo_near}]
+    if args.get("cursor"):
+        value, last_id = decode_cursor(args["cursor"], "distance_km", 1)
+        # Let the index skip earlier rings; the keyset match breaks ties
+        geo_near["minDistance"] = max(0.0, value * 1000 - 1)
+        pipeline.append({"$match": keyset_filter("distance_km", value, last_id)})
+
+    projection = event_projection(args)
+    projection = {**projection, "distance_km": 1} if projection else HIDDEN_FIELDS
+    # Sort before $limit: $geoNear returns equal distances in no set order,
+    # so limiting first could drop _ids the keyset cursor then skips over
+    pipeline += [
+        {"$sort": {"distance_km": 1, "_id": 1}},
+        {"$limit": limit + 1 if paged else limit},
+        {"$project": projection},
+    ]
+    return Nearby(pipeline, limit, paged, cache_key)
+
+
+def nearby_body(nearby, events):
+    """Response body for nearby_search: a list, or an envelope in cursor mode."""
+    if not nearby.paged:
+        return events
+    next_cursor = None
+    if len(events) > nearby.limit:
+        events = events[:nearby.limit]
+        next_cursor = encode_cursor(events[-1], "distance_km", 1)
+    return {"events": events, "next_cursor": next_cursor}
+
+
+def new_event(data):
+    """Event document for POST /events."""
+    if not data or "name" not in data or "date" not in data:
+        raise ValueError("Missing required fields")
+    event = {
+        "name": data["name"],
+        "description": data.get("description", ""),
+        "category": data.get("category", "General"),
+        "price": float(data.get("price", 0)),
+        "available_seats": int(data.get("available_seats", 100)),
+        "location": data.get("location", {}),
+        "date": data["date"],
+        "created_at": data.get("created_at", ""),
+        "review_count": 0,
+        "avg_rating": None,
+        "version": 1,
+        "updated_at": datetime.utcnow(),
+    }
+    event["search"] = search_fields(event)
+    return event
+
+
+def event_update(data):
+    """$set for PUT /events/<id>, refreshing derived search fields and the version."""
+    data = {k: v for k, v in data.items() if k not in ("_id", "version", "updated_at", "seat_shards")}
+    return bump({"$set": {**data, **search_updates(data)}})
+
+
+# BOOKINGS
+# user_id is stored as an ObjectId (see `flask --app app migrate-booking-users`)
+# so each lookup is a single equality match on the user_* indexes.
+
+def user_bookings_query(user_id, args):
+    query = {"user_id": ObjectId(user_id)}
+    if "status" in args:
+        query["status"] = args["status"]
+    return query
+
+
+def owned_booking(booking_id, user_id):
+    """Filter matching a booking only if it belongs to user_id."""
+    return {"_id": ObjectId(booking_id), "user_id": ObjectId(user_id)}
+
+
+def _booking(user_id, event_id, ticket_count, now):
+    ticket_count = int(ticket_count)
+    if ticket_count < 1:
+        raise ValueError("ticket_count must be at least 1")
+    return {
+        "_id": ObjectId(),
+        "user_id": ObjectId(user_id),
+        "event_id": ObjectId(event_id),
+        "ticket_count": ticket_count,
+        "status": "confirmed",
+        "created_at": now
+    }
+
+
+def new_booking(user_id, data):
+    """Booking document for POST /bookings."""
+    if not data or "event_id" not in data:
+        raise ValueError("Missing required field: event_id")
+    return _booking(user_id, data["event_id"], data.get("ticket_count", 1), datetime.utcnow())
+
+
+def bulk_bookings(user_id, data, max_items):
+    """Validate POST /bookings/bulk items.
+
+    Returns (bookings, positions, results): ready-to-insert documents, the
+    item index each came from, and a results list pre-filled for invalid
+    items. Raises ValueError if the request itself is invalid.
+    """
+    items = data.get("items") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError("Missing required field: items")
+    if len(items) > max_items:
+        raise ValueError(f"At most {max_items} items per request")
+
+    results = [None] * len(items)
+    bookings, positions = [], []
+    now = datetime.utcnow()
+    for index, item in enumerate(items):
+        try:
+            bookings.append(_booking(user_id, item["event_id"], item.get("ticket_count", 1), now))
+        except Exception as e:
+            results[index] = {"status": "failed", "error": str(e) or "Invalid item"}
+            continue
+        positions.append(index)
+    return bookings, positions, results
+
+
+def bulk_body(results, positions, booked_results):
+    """Merge book_many results into the per-item response."""
+    for index, result in zip(positions, booked_results):
+        results[index] = result
+    for index, result in enumerate(results):
+        result["index"] = index
+    booked = sum(1 for r in results if r["status"] == "booked")
+    return {"booked": booked, "failed": len(results) - booked, "results": results}
+
+
+# REVIEWS
+
+def review_page(event_id, args):
+    """GET /reviews/<event_id>: (event oid, filter, limit, cursor).
+
+    The cursor comes from ?cursor= (envelope responses) or ?after= (the
+    plain-list continuation sent in Link headers).
+    """
+    oid = ObjectId(event_id)
+    limit = parse_limit(args.get("limit"), default=REVIEWS_PAGE_SIZE)
+    query = {"event_id": oid}
+    cursor = args.get("cursor") or args.get("after")
+    if cursor:
+        _, last_id = decode_cursor(cursor, "_id", -1)
+        query["_id"] = {"$lt": last_id}
+    return oid, query, limit, cursor
+
+
+def review_page_body(reviews, limit):
+    next_cursor = encode_cursor(reviews[limit - 1], "_id", -1) if len(reviews) > limit else None
+    return {"reviews": reviews[:limit], "next_cursor": next_cursor}
+
+
+def new_review(oid, data):
+    """Review document for POST /reviews/<event_id>."""
+    if not data or "comment" not in data or "rating" not in data:
+        raise ValueError("Missing required fields")
+    return {
+        "event_id": oid,
+        "user_id": data.get("user_id"),
+        "comment": data["comment"],
+        "rating": parse_rating(data["rating"]),
+        "date": data.get("date", "")
+    }
+
+
+def review_updates(data):
+    updates = {field: data[field] for field in ("comment", "rating", "date") if field in (data or {})}
+    if not updates:
+        raise ValueError("No valid fields to update")
+    if "rating" in updates:
+        updates["rating"] = parse_rating(updates["rating"])
+    return updates
+
+
+# AUTH
+
+def profile_updates(data, hash_password):
+    """$set fields for PUT /auth/profile; hash_password hashes a new password."""
+    updates = {}
+    if "username" in (data or {}):
+        updates["username"] = data["username"]
+    if "password" in (data or {}):
+        updates["password"] = hash_password(data["password"])
+    if not updates:
+        raise ValueError("No valid fields to update")
+    return updates
@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Reverse proxies in front of the app that append to X-Forwarded-For
+# (0 = clients connect directly and the header is ignored)
+TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", 0))
+
+
+class TokenBucket:
+    """In-process token buckets keyed by string (e.g. "user:alice").
+
+    Each key holds up to `capacity` tokens refilled at `rate` per second.
+    Idle keys are evicted oldest-first once `max_keys` is reached, so memory
+    stays bounded under floods of distinct keys.
+    """
+
+    def __init__(self, capacity, rate, max_keys=100_000):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _level(self, key, now):
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def take(self, key, now=None):
+        """Spend one token; returns 0 on success or seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens = self._level(key, now)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                self._buckets.move_to_end(key)
+                return (1 - tokens) / self.rate
+            self._buckets[key] = (tokens - 1, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return 0
+
+    def refund(self, key):
+        """Forget a key, e.g. after the user proved they know the password."""
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+class LoginLimiter:
+    """Per-username and per-IP login throttling, checked before any hashing."""
+
+    def __init__(self):
+        per_minute = lambda name, default: float(os.getenv(name, default)) / 60
+        self.enabled = os.getenv("LOGIN_RATE_LIMIT", "1") != "0"
+        self.users = TokenBucket(int(os.getenv("LOGIN_USER_BURST", 5)), per_minute("LOGIN_USER_PER_MINUTE", 5))
+        self.ips = TokenBucket(int(os.getenv("LOGIN_IP_BURST", 20)), per_minute("LOGIN_IP_PER_MINUTE", 30))
+        self.rejected = 0
+
+    def reset(self):
+        self.users = TokenBucket(self.users.capacity, self.users.rate, self.users.max_keys)
+        self.ips = TokenBucket(self.ips.capacity, self.ips.rate, self.ips.max_keys)
+        self.rejected = 0
+
+    def check(self, username, ip):
+        """Return 0 if the attempt may proceed, else a Retry-After in seconds."""
+        if not self.enabled:
+            return 0
+        wait = self.ips.take(f"ip:{ip}") or self.users.take(f"user:{username}")
+        if wait:
+            self.rejected += 1
+        return wait
+
+    def succeeded(self, username):
+        # A correct password clears the username's budget so a user who
+        # mistyped a few times is not locked out for the next login
+        self.users.refund(f"user:{username}")
+
+
+login_limiter = LoginLimiter()
+
+
+def client_ip(req):
+    """Client address for a Flask or Quart request. Behind TRUSTED_PROXIES
+    proxies it is the X-Forwarded-For entry the outermost one appended;
+    entries further left are client-supplied and can be forged."""
+    if TRUSTED_PROXIES:
+        forwarded = [part.strip() for part in req.headers.get("X-Forwarded-For", "").split(",") if part.strip()]
+        if len(forwarded) >= TRUSTED_PROXIES:
+            return forwarded[-TRUSTED_PROXIES]
+    return req.remote_addr
@@ -0,0 +1,145 @@
+import threading
+import time
+from pymongo import UpdateOne
+from core.etags import PIPELINE_BUMP, bump
+
+RATINGS = (1, 2, 3, 4, 5)
+
+
+def parse_rating(value):
+    """Validate a review rating (integer 1-5)."""
+    try:
+        rating = int(value)
+        whole = float(value) == rating
+    except (TypeError, ValueError):
+        rating, whole = None, False
+    if isinstance(value, bool) or not whole or rating not in RATINGS:
+        raise ValueError("rating must be an integer from 1 to 5")
+    return rating
+
+
+def _counter(field, delta):
+    return {"$add": [{"$ifNull": [f"${field}", 0]}, delta]}
+
+
+def rating_delta_update(added=None, removed=None):
+    """Pipeline update adjusting an event's rating aggregates, or None.
+
+    avg_rating is recomputed from the incremented counters in the same
+    write, so the whole change is atomic.
+    """
+    deltas = {}
+    if added in RATINGS:
+        deltas[added] = deltas.get(added, 0) + 1
+    # Legacy reviews may hold ratings that were never counted
+    if removed in RATINGS:
+        deltas[removed] = deltas.get(removed, 0) - 1
+    deltas = {rating: n for rating, n in deltas.items() if n}
+    if not deltas:
+        return None
+
+    counters = {
+        "review_count": _counter("review_count", sum(deltas.values())),
+        "rating_sum": _counter("rating_sum", sum(r * n for r, n in deltas.items())),
+    }
+    for rating, n in deltas.items():
+        counters[f"rating_hist.{rating}"] = _counter(f"rating_hist.{rating}", n)
+
+    return [
+        {"$set": counters},
+        {"$set": {"avg_rating": {"$cond": [
+            {"$gt": ["$review_count", 0]},
+            {"$divide": ["$rating_sum", "$review_count"]},
+            None,
+        ]}}},
+        PIPELINE_BUMP,
+    ]
+
+
+def apply_rating_delta(db, event_id, added=None, removed=None):
+    """Steps (core.flow) atomically adjusting an event's review_count,
+    rating_sum, histogram and avg.
+
+    Returns False if there was nothing to change (the event was not written).
+    """
+    update = rating_delta_update(added, removed)
+    if update:
+        yield lambda: db.events.update_one({"_id": event_id}, update)
+    return update is not None
+
+
+def reconcile_ratings(db, fix=True, batch_size=500):
+    """Recompute rating aggregates from the reviews collection.
+
+    Returns {"checked": n, "drifted": n}; drifted events are rewritten
+    unless fix is False.
+    """
+    actual = {}
+    pipeline = [
+        {"$group": {"_id": {"event_id": "$event_id", "rating": "$rating"}, "n": {"$sum": 1}}},
+    ]
+    for row in db.reviews.aggregate(pipeline, allowDiskUse=True):
+        event_id, rating = row["_id"]["event_id"], row["_id"]["rating"]
+        if rating not in RATINGS:
+            continue
+        agg = actual.setdefault(event_id, {"review_count": 0, "rating_sum": 0, "rating_hist": {}})
+        agg["review_count"] += row["n"]
+        agg["rating_sum"] += rating * row["n"]
+        agg["rating_hist"][str(rating)] = row["n"]
+
+    empty = {"review_count": 0, "rating_sum": 0, "rating_hist": {}}
+    fields = {"review_count": 1, "rating_sum": 1, "rating_hist": 1, "avg_rating": 1}
+    checked = drifted = 0
+    ops = []
+
+    def check(event):
+        nonlocal checked, drifted, ops
+        checked += 1
+        expected = dict(actual.get(event["_id"], empty))
+        count = expected["review_count"]
+        expected["avg_rating"] = expected["rating_sum"] / count if count else None
+        current = {
+            "review_count": event.get("review_count", 0),
+            "rating_sum": event.get("rating_sum", 0),
+            "rating_hist": {k: v for k, v in (event.get("rating_hist") or {}).items() if v},
+            "avg_rating": event.get("avg_rating"),
+        }
+        if current != expected:
+            drifted += 1
+            if fix:
+                # Only overwrite if no review delta landed since we read it
+                guard = {"_id": event["_id"], "review_count": event.get("review_count"),
+                         "rating_sum": event.get("rating_sum")}
+                ops.append(UpdateOne(guard, bump({"$set": expected})))
+        if len(ops) >= batch_size:
+            db.events.bulk_write(ops, ordered=False)
+            ops = []
+
+    # Events that have reviews, looked up in chunks to keep queries small
+    event_ids = list(actual)
+    for i in range(0, len(event_ids), batch_size):
+        for event in db.events.find({"_id": {"$in": event_ids[i:i + batch_size]}}, fields):
+            check(event)
+    # Events that claim reviews but have none left
+    for event in db.events.find({"review_count": {"$gt": 0}}, fields).batch_size(batch_size):
+        if event["_id"] not in actual:
+            check(event)
+
+    if ops:
+        db.events.bulk_write(ops, ordered=False)
+    return {"checked": checked, "drifted": drifted}
+
+
+def start_reconciler(app, db_getter, interval):
+    """Run reconcile_ratings every `interval` seconds in a daemon thread."""
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                result = reconcile_ratings(db_getter())
+                if result["drifted"]:
+                    app.logger.warning("Reconciled ratings on %d events", result["drifted"])
+            except Exception as e:
+                app.logger.warning("Rating reconciliation failed: %s", e)
+
+    threading.Thread(target=loop, daemon=True).start()
@@ -0,0 +1,376 @@
+import os
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+from core import inventory
+from core.cache import invalidate_event
+from core.etags import bump
+from core.flow import Many, transaction
+from core.indexes import UNIQUE_BOOKINGS
+
+load_dotenv()
+
+# auto: use multi-document transactions when the server is a replica set or
+# mongos; on|off force it. Without them status changes are ordered so a
+# crash can only leave seats unreleased, never released twice.
+BOOKING_TRANSACTIONS = os.getenv("BOOKING_TRANSACTIONS", "auto")
+
+
+class ReservationError(Exception):
+    """Booking could not be made; carries the HTTP status to return."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+DUPLICATE_BOOKING = "You already booked this event"
+
+# Booking status machine; pending and confirmed bookings hold their seats
+TRANSITIONS = {
+    "pending": {"confirmed", "cancelled"},
+    "confirmed": {"cancelled"},
+    "cancelled": set(),
+}
+HOLDS_SEATS = {"pending", "confirmed"}
+
+
+# Events with sharded seats (core.inventory) are never matched by the
+# single-counter updates, whatever a process believes about them
+UNSHARDED = {"seat_shards": {"$exists": False}}
+
+
+def _reserve_update(event_id, ticket_count):
+    """Filter/update pair that takes seats only if enough are left."""
+    return (
+        {"_id": event_id, "available_seats": {"$gte": ticket_count}, **UNSHARDED},
+        bump({"$inc": {"available_seats": -ticket_count}}),
+    )
+
+
+def _release_update(event_id, ticket_count):
+    return {"_id": event_id, **UNSHARDED}, bump({"$inc": {"available_seats": ticket_count}})
+
+
+# Reservations are steps (core.flow): the Flask app drives them with run(),
+# the ASGI app with run_async().
+
+def _reserve_failed(event_exists):
+    return ReservationError("Not enough available seats", 400) if event_exists else ReservationError("Event not found", 404)
+
+
+def reserve_seats(db, event_id, ticket_count):
+    """Atomically take seats from an event in a single conditional update
+    (or from one of its seat shards)."""
+    taken = (yield from inventory.reserve(db, event_id, ticket_count)) if inventory.shard_count(event_id) else None
+    if taken is None:
+        reserved = yield lambda: db.events.find_one_and_update(*_reserve_update(event_id, ticket_count),
+                                                               projection={"_id": 1})
+        if reserved is None:
+            # Only the failure path pays for telling "missing" from "full",
+            # and for finding out the event has been sharded
+            event = yield lambda: db.events.find_one({"_id": event_id}, {"seat_shards": 1})
+            if event is None:
+                raise _reserve_failed(False)
+            taken = bool(event.get("seat_shards")) and (yield from inventory.reserve(db, event_id, ticket_count)) is True
+    if taken is False:
+        raise _reserve_failed(True)
+    invalidate_event(event_id)
+
+
+def release_seats(db, event_id, ticket_count, session=None):
+    """Give seats back to an event (cancellation or compensation)."""
+    result = yield lambda: db.events.update_one(*_release_update(event_id, ticket_count), session=session)
+    if not result.matched_count:
+        yield from inventory.release(db, event_id, ticket_count, session=session)
+    invalidate_event(event_id)
+
+
+def _held(booking):
+    """Seats a booking currently holds."""
+    return booking.get("ticket_count", 1) if booking.get("status", "confirmed") in HOLDS_SEATS else 0
+
+
+def _check_transition(booking, status):
+    if booking is None:
+        raise ReservationError("Booking not found", 404)
+    current = booking.get("status", "confirmed")
+    if status != current and status not in TRANSITIONS.get(current, ()):
+        raise ReservationError(f"Cannot change a {current} booking to {status}", 409)
+    return current
+
+
+def _status_update(current, status):
+    # Matching on the current status makes the change a compare-and-set, so
+    # of two concurrent requests only one applies the seat delta
+    return {"status": current}, {"$set": {"status": status, "updated_at": datetime.utcnow()}}
+
+
+def _validate_status(status):
+    if status not in TRANSITIONS:
+        raise ReservationError(f"status must be one of: {', '.join(TRANSITIONS)}", 400)
+
+
+_transaction_support = {}
+
+
+def _use_transactions(db):
+    if BOOKING_TRANSACTIONS != "auto":
+        return BOOKING_TRANSACTIONS == "on"
+    client = db.client
+    if client not in _transaction_support:
+        try:
+            hello = yield lambda: client.admin.command("hello")
+            _transaction_support[client] = "setName" in hello or hello.get("msg") == "isdbgrid"
+        except PyMongoError:
+            return False
+    return _transaction_support[client]
+
+
+def atomic(db, apply):
+    """Run the steps apply(session) in a transaction if the deployment has
+    them (BOOKING_TRANSACTIONS), otherwise with session=None."""
+    if not (yield from _use_transactions(db)):
+        return (yield from apply(None))
+    return (yield transaction(db.client, apply))
+
+
+# Seconds before a database found without the UNIQUE_BOOKINGS index is
+# checked again (the index may have been built since)
+UNIQUE_INDEX_RECHECK = 60
+
+_unique_index = {}
+
+
+def _has_unique_index(db):
+    """Steps: whether duplicate confirmed bookings are rejected by the
+    UNIQUE_BOOKINGS index. Its build fails while duplicates exist."""
+    key = (db.client, db.name)
+    present, checked_at = _unique_index.get(key, (False, None))
+    if present or (checked_at is not None and time.monotonic() - checked_at < UNIQUE_INDEX_RECHECK):
+        return present
+    try:
+        info = yield lambda: db.bookings.index_information()
+    except PyMongoError:
+        return False
+    present = UNIQUE_BOOKINGS in info
+    _unique_index[key] = (present, time.monotonic())
+    return present
+
+
+def _duplicates(db, bookings):
+    """Steps for the positions of confirmed bookings whose (user, event)
+    already has a confirmed booking, stored or earlier in `bookings`. Only
+    needed without the unique index; unlike it, this leaves a race window."""
+    confirmed = [i for i, booking in enumerate(bookings) if booking.get("status", "confirmed") == "confirmed"]
+    if not confirmed:
+        return set()
+    pairs = [{"user_id": bookings[i]["user_id"], "event_id": bookings[i]["event_id"]} for i in confirmed]
+    existing = yield Many(lambda: db.bookings.find({"status": "confirmed", "$or": pairs},
+                                                   {"user_id": 1, "event_id": 1}))
+    seen = {(doc["user_id"], doc["event_id"]) for doc in existing}
+    duplicates = set()
+    for i in confirmed:
+        pair = (bookings[i]["user_id"], bookings[i]["event_id"])
+        if pair in seen:
+            duplicates.add(i)
+        seen.add(pair)
+    return duplicates
+
+
+def change_status(db, booking_filter, status):
+    """Move a booking to `status` and release its seats in the same
+    transaction when it stops holding them. Setting the current status again
+    is a no-op. Returns the updated booking."""
+    _validate_status(status)
+
+    def apply(session):
+        booking = yield lambda: db.bookings.find_one(booking_filter, session=session)
+        current = _check_transition(booking, status)
+        if status == current:
+            return booking
+        if status == "confirmed" and not (yield from _has_unique_index(db)):
+            other = yield lambda: db.bookings.find_one({"user_id": booking["user_id"], "event_id": booking["event_id"],
+                                                        "status": "confirmed", "_id": {"$ne": booking["_id"]}},
+                                                       {"_id": 1}, session=session)
+            if other:
+                raise ReservationError(DUPLICATE_BOOKING, 400)
+        match, update = _status_update(current, status)
+        try:
+            updated = yield lambda: db.bookings.find_one_and_update({**booking_filter, **match}, update,
+                                                                    session=session,
+                                                                    return_document=ReturnDocument.AFTER)
+        except DuplicateKeyError:
+            raise ReservationError(DUPLICATE_BOOKING, 400)
+        if updated is None:
+            raise ReservationError("Booking was changed by another request, retry", 409)
+        released = _held(booking) - _held(updated)
+        if released:
+            yield from release_seats(db, booking["event_id"], released, session=session)
+        return updated
+
+    return (yield from atomic(db, apply))
+
+
+def remove_booking(db, booking_filter):
+    """Delete a booking and give back the seats it still held (none for a
+    cancelled booking). Returns the deleted booking."""
+    def apply(session):
+        booking = yield lambda: db.bookings.find_one_and_delete(booking_filter, session=session)
+        if booking is None:
+            raise ReservationError("Booking not found", 404)
+        if _held(booking):
+            yield from release_seats(db, booking["event_id"], _held(booking), session=session)
+        return booking
+
+    return (yield from atomic(db, apply))
+
+
+def book_seats(db, booking):
+    """Reserve seats then insert the booking, compensating if the insert fails.
+
+    Duplicate confirmed bookings are rejected by the unique partial index on
+    bookings (user_id, event_id), so no separate lookup is needed while it
+    exists.
+    """
+    event_id, ticket_count = booking["event_id"], booking["ticket_count"]
+    if not (yield from _has_unique_index(db)) and (yield from _duplicates(db, [booking])):
+        raise ReservationError(DUPLICATE_BOOKING, 400)
+    yield from reserve_seats(db, event_id, ticket_count)
+    try:
+        result = yield lambda: db.bookings.insert_one(booking)
+        return result.inserted_id
+    except DuplicateKeyError:
+        yield from release_seats(db, event_id, ticket_count)
+        raise ReservationError(DUPLICATE_BOOKING, 400)
+    except Exception:
+        yield from release_seats(db, event_id, ticket_count)
+        raise
+
+
+def book_many(db, bookings):
+    """Book many seats with one reservation per event and one insert_many.
+
+    `bookings` are ready-to-insert documents. Returns a result per input in
+    the same order: {"status": "booked", "booking_id": id} or
+    {"status": "failed", "error": message}. If an event cannot seat all of
+    its items at once, they are reserved one by one in request order so
+    only the items that do not fit fail. Seats for bookings that fail to
+    insert (e.g. duplicates) are given back. The async app issues the
+    per-event reservations concurrently.
+    """
+    results = [None] * len(bookings)
+    duplicates = set()
+    if not (yield from _has_unique_index(db)):
+        duplicates = yield from _duplicates(db, bookings)
+        _fail(results, duplicates, DUPLICATE_BOOKING)
+    by_event = _by_event(bookings, skip=duplicates)
+
+    # One conditional update per event covering all of its items
+    outcomes = yield [reserve_seats(db, event_id, sum(bookings[i]["ticket_count"] for i in indexes))
+                      for event_id, indexes in by_event.items()]
+    reserved, retry, unexpected = [], [], None
+    for indexes, outcome in zip(by_event.values(), outcomes):
+        if isinstance(outcome, ReservationError) and outcome.status == 400 and len(indexes) > 1:
+            retry.append(indexes)
+        elif isinstance(outcome, ReservationError):
+            _fail(results, indexes, outcome)
+        elif isinstance(outcome, BaseException):
+            unexpected = outcome
+        else:
+            reserved.extend(indexes)
+
+    if retry and unexpected is None:
+        retried = yield [_reserve_each(db, bookings, indexes) for indexes in retry]
+        for indexes, item_outcomes in zip(retry, retried):
+            if isinstance(item_outcomes, BaseException):
+                unexpected = item_outcomes
+                continue
+            for i, outcome in zip(indexes, item_outcomes):
+                if isinstance(outcome, ReservationError):
+                    _fail(results, [i], outcome)
+                elif isinstance(outcome, BaseException):
+                    unexpected = outcome
+                else:
+                    reserved.append(i)
+    if unexpected is not None:
+        # Give back what the other reservations took
+        yield from _release_many(db, [bookings[i] for i in reserved])
+        raise unexpected
+
+    docs = [bookings[i] for i in reserved]
+    failed = {}
+    if docs:
+        try:
+            yield lambda: db.bookings.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            failed = _insert_failures(e)
+        except Exception:
+            yield from _release_many(db, docs)
+            raise
+
+    yield from _release_many(db, [docs[pos] for pos in failed])
+    return _merge_results(results, reserved, docs, failed)
+
+
+def _reserve_each(db, bookings, indexes):
+    """Reserve the items of one event separately, in order; each outcome is
+    None or the exception that item failed with."""
+    outcomes = []
+    for i in indexes:
+        try:
+            yield from reserve_seats(db, bookings[i]["event_id"], bookings[i]["ticket_count"])
+            outcomes.append(None)
+        except Exception as e:
+            outcomes.append(e)
+    return outcomes
+
+
+def _by_event(bookings, skip=()):
+    by_event = {}
+    for index, booking in enumerate(bookings):
+        if index in skip:
+            continue
+        by_event.setdefault(booking["event_id"], []).append(index)
+    return by_event
+
+
+def _fail(results, indexes, error):
+    for i in indexes:
+        results[i] = {"status": "failed", "error": str(error)}
+
+
+def _insert_failures(error):
+    """Map insert_many write errors to {position: message}."""
+    failed = {}
+    for write_error in error.details.get("writeErrors", []):
+        duplicate = write_error.get("code") == 11000
+        failed[write_error["index"]] = DUPLICATE_BOOKING if duplicate else write_error.get("errmsg")
+    return failed
+
+
+def _merge_results(results, reserved, docs, failed):
+    for pos, i in enumerate(reserved):
+        if pos in failed:
+            results[i] = {"status": "failed", "error": failed[pos]}
+        else:
+            results[i] = {"status": "booked", "booking_id": docs[pos]["_id"]}
+    return results
+
+
+def _seat_totals(bookings):
+    totals = {}
+    for booking in bookings:
+        totals[booking["event_id"]] = totals.get(booking["event_id"], 0) + booking["ticket_count"]
+    return totals
+
+
+def _release_many(db, bookings):
+    """Return seats for several bookings with one update per event."""
+    outcomes = yield [release_seats(db, event_id, ticket_count)
+                      for event_id, ticket_count in _seat_totals(bookings).items()]
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
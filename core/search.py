@@ -0,0 +1,73 @@
+import re
+import time
+from pymongo import UpdateOne
+
+# Search parameter -> event field it is derived from. Each one gets a
+# lowercased copy under `search.<param>` so prefix matches use an index.
+SEARCH_FIELDS = {"category": "category", "city": "city", "location": "location.name"}
+
+# Internal fields kept out of API responses
+HIDDEN_FIELDS = {"search": 0}
+
+TEXT_SCORE = {"$meta": "textScore"}
+
+
+def normalize(value):
+    return str(value).strip().lower() if value else ""
+
+
+def _source_value(event, path):
+    value = event
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def search_fields(event):
+    """Normalized keyword fields to store with a new event."""
+    return {param: normalize(_source_value(event, path)) for param, path in SEARCH_FIELDS.items()}
+
+
+def search_updates(data):
+    """$set entries refreshing the keyword fields touched by an update."""
+    updates = {}
+    for param, path in SEARCH_FIELDS.items():
+        top = path.split(".")[0]
+        if path in data:
+            updates[f"search.{param}"] = normalize(data[path])
+        elif top in data:
+            updates[f"search.{param}"] = normalize(_source_value(data, path))
+    return updates
+
+
+def prefix_filter(param, value):
+    """Case-insensitive prefix match answered from the search.<param> index."""
+    return {f"search.{param}": {"$regex": "^" + re.escape(normalize(value))}}
+
+
+def regex_filter(param, value):
+    """Legacy unanchored, case-insensitive match (always a collection scan)."""
+    return {SEARCH_FIELDS[param]: {"$regex": re.escape(value), "$options": "i"}}
+
+
+def text_filter(q):
+    return {"$text": {"$search": q}}
+
+
+def backfill_search_fields(db, batch_size=1000, progress=print):
+    """Populate search.* on events written before keyword fields existed."""
+    started = time.perf_counter()
+    done = 0
+    ops = []
+    projection = {path: 1 for path in SEARCH_FIELDS.values()}
+    for event in db.events.find({}, projection).batch_size(batch_size):
+        ops.append(UpdateOne({"_id": event["_id"]}, {"$set": {"search": search_fields(event)}}))
+        if len(ops) >= batch_size:
+            db.events.bulk_write(ops, ordered=False)
+            done += len(ops)
+            ops = []
+            progress(f"  {done} events ({time.perf_counter() - started:.1f}s)")
+    if ops:
+        db.events.bulk_write(ops, ordered=False)
+        done += len(ops)
+    return done
@@ -0,0 +1,150 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from pymongo.errors import DuplicateKeyError
+from core.inventory import sync_all
+
+load_dotenv()
+
+# Seconds a summary may age before a read triggers a refresh
+STATS_MAX_AGE = float(os.getenv("STATS_MAX_AGE", 300))
+
+# Upper bound on one refresh; a crashed refresher's lease expires after this
+REFRESH_LEASE = timedelta(seconds=120)
+
+PRICE_BANDS = [0, 10, 25, 50, 100]
+
+META = "stats_meta"
+
+# "YYYY-MM" from either a date string or a BSON date (ISO string form)
+_MONTH = {"$substrBytes": [{"$toString": "$date"}, 0, 7]}
+
+_PRICE_BAND = {
+    "groupBy": "$price",
+    "boundaries": PRICE_BANDS,
+    "default": f"{PRICE_BANDS[-1]}+",
+}
+
+_EVENT_TOTALS = {
+    "total_events": {"$sum": 1},
+    "avg_price": {"$avg": "$price"},
+    "available_seats": {"$sum": "$available_seats"},
+}
+
+
+def _group(key):
+    return [{"$group": {"_id": key, **_EVENT_TOTALS}}]
+
+
+def _booked_by_category():
+    return [
+        {"$match": {"status": "confirmed"}},
+        {"$group": {"_id": "$event_id", "booked_seats": {"$sum": "$ticket_count"}}},
+        {"$lookup": {"from": "events", "localField": "_id", "foreignField": "_id", "as": "event"}},
+        {"$unwind": "$event"},
+        {"$group": {"_id": "$event.category", "booked_seats": {"$sum": "$booked_seats"}}},
+    ]
+
+
+# dimension -> list of (source collection, pipeline) merged into stats_<dimension>
+DIMENSIONS = {
+    "category": [("events", _group("$category"))],
+    "city": [("events", _group("$city"))],
+    "month": [("events", _group(_MONTH))],
+    "price_band": [("events", [{"$bucket": {**_PRICE_BAND, "output": _EVENT_TOTALS}}])],
+    "seats": [
+        # booked_seats is reset here so categories without bookings drop to 0
+        ("events", [{"$group": {"_id": "$category", "available_seats": {"$sum": "$available_seats"},
+                                "booked_seats": {"$sum": 0}}}]),
+        ("bookings", _booked_by_category()),
+    ],
+}
+
+# Default row order per dimension
+DEFAULT_SORT = {
+    "category": [("total_events", -1), ("_id", 1)],
+    "city": [("total_events", -1), ("_id", 1)],
+    "month": [("_id", 1)],
+    "price_band": [("_id", 1)],
+    "seats": [("booked_seats", -1), ("_id", 1)],
+}
+
+_refreshing = set()
+_refreshing_guard = threading.Lock()
+
+
+def summary_collection(db, dimension):
+    return db[f"stats_{dimension}"]
+
+
+def refresh_stats(db, dimension):
+    """Rebuild one summary collection with $merge and record when it ran.
+
+    Groups are upserted in place, so readers never see an empty summary;
+    groups that no longer exist are dropped afterwards.
+    """
+    started = datetime.utcnow()
+    target = summary_collection(db, dimension).name
+    # Sharded events only store a lagging copy of their seat count
+    sync_all(db)
+    for source, pipeline in DIMENSIONS[dimension]:
+        db[source].aggregate(pipeline + [
+            {"$set": {"refreshed_at": started}},
+            {"$merge": {"into": target, "whenMatched": "merge", "whenNotMatched": "insert"}},
+        ])
+    summary_collection(db, dimension).delete_many({"refreshed_at": {"$lt": started}})
+    db[META].update_one({"_id": dimension},
+                        {"$set": {"refreshed_at": started}, "$unset": {"lease_until": ""}}, upsert=True)
+    return started
+
+
+def _acquire_lease(db, dimension):
+    """Claim the refresh for this dimension across workers; False if taken."""
+    now = datetime.utcnow()
+    try:
+        db[META].update_one(
+            {"_id": dimension, "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]},
+            {"$set": {"lease_until": now + REFRESH_LEASE}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        # The upsert collided with a live lease held by another worker
+        return False
+
+
+def _refresh_once(db, dimension, logger=None):
+    with _refreshing_guard:
+        if dimension in _refreshing:
+            return
+        _refreshing.add(dimension)
+    try:
+        if _acquire_lease(db, dimension):
+            refresh_stats(db, dimension)
+    except Exception as e:
+        if logger:
+            logger.warning("Stats refresh for %s failed: %s", dimension, e)
+        else:
+            raise
+    finally:
+        with _refreshing_guard:
+            _refreshing.discard(dimension)
+
+
+def read_stats(db, dimension, max_age=None, logger=None, reader=None):
+    """Return summary rows for a dimension, refreshing them when stale.
+
+    A missing summary is built inline; a stale one is served as-is while a
+    background thread rebuilds it, so polling never waits on a full scan.
+    Refreshes always go through db; the returned collection is bound to
+    reader (e.g. a secondary-preferred handle) when given.
+    """
+    max_age = STATS_MAX_AGE if max_age is None else max_age
+    meta = db[META].find_one({"_id": dimension}, {"refreshed_at": 1}) or {}
+    refreshed_at = meta.get("refreshed_at")
+    if refreshed_at is None:
+        _refresh_once(db, dimension)
+    elif datetime.utcnow() - refreshed_at > timedelta(seconds=max_age):
+        threading.Thread(target=_refresh_once, args=(db, dimension, logger), daemon=True).start()
+    return summary_collection(reader if reader is not None else db, dimension)
@@ -0,0 +1,56 @@
+import os
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Documents fetched per getMore and flushed per chunk while streaming
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 500))
+
+
+def wants_stream(req=None):
+    """True for ?stream=1 or when the client prefers NDJSON over JSON."""
+    req = req or request
+    if req.args.get("stream") in ("1", "true"):
+        return True
+    return req.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def ndjson_response(cursor, batch_size=STREAM_BATCH_SIZE):
+    """Stream a PyMongo cursor as newline-delimited JSON.
+
+    Only one batch of documents is held in memory at a time, so memory use
+    does not grow with the number of rows returned.
+    """
+    cursor.batch_size(batch_size)
+    dumps = current_app.json.dumps_bytes
+
+    def generate():
+        try:
+            chunk = []
+            for doc in cursor:
+                chunk.append(dumps(doc))
+                if len(chunk) >= batch_size:
+                    yield b"\n".join(chunk) + b"\n"
+                    chunk = []
+            if chunk:
+                yield b"\n".join(chunk) + b"\n"
+        finally:
+            cursor.close()
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+async def ndjson_chunks_async(cursor, dumps, batch_size=STREAM_BATCH_SIZE):
+    """Async counterpart of ndjson_response's generator for AsyncCursor."""
+    cursor.batch_size(batch_size)
+    try:
+        chunk = []
+        async for doc in cursor:
+            chunk.append(dumps(doc))
+            if len(chunk) >= batch_size:
+                yield b"\n".join(chunk) + b"\n"
+                chunk = []
+        if chunk:
+            yield b"\n".join(chunk) + b"\n"
+    finally:
+        await cursor.close()
@@ -0,0 +1,102 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+import jwt
+
+# Matches flask-jwt-extended's defaults so tokens work on both apps
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRES = timedelta(hours=2)
+
+
+class TokenError(Exception):
+    """Missing, expired or otherwise invalid access token."""
+
+    def __init__(self, message, status=422):
+        super().__init__(message)
+        self.status = status
+
+
+def user_claims(user):
+    """Claims embedded at login so routes need not look the user up.
+
+    iat is overridden with sub-second precision so a token issued right
+    after Blocklist.revoke_user in the same second is not revoked by it.
+    """
+    return {"username": user["username"], "role": user.get("role", "user"), "iat": time.time()}
+
+
+def create_access_token(identity, secret, expires_delta=timedelta(minutes=15), additional_claims=None):
+    now = datetime.now(timezone.utc)
+    # Additional claims override the defaults, as in flask-jwt-extended
+    claims = {
+        "fresh": False,
+        "iat": now,
+        "jti": str(uuid.uuid4()),
+        "type": "access",
+        "sub": identity,
+        "nbf": now,
+        "exp": now + expires_delta,
+        **(additional_claims or {}),
+    }
+    return jwt.encode(claims, secret, ALGORITHM)
+
+
+def decode_access_token(authorization, secret):
+    """Claims from an 'Authorization: Bearer <token>' header value."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme != "Bearer" or not token:
+        raise TokenError("Missing Authorization Header", 401)
+    try:
+        claims = jwt.decode(token, secret, algorithms=[ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise TokenError("Token has expired", 401)
+    except jwt.InvalidTokenError as e:
+        raise TokenError(str(e))
+    if claims.get("type") != "access":
+        raise TokenError("Only access tokens are allowed")
+    return claims
+
+
+class Blocklist:
+    """In-memory token revocation, checked on every authenticated request.
+
+    Holds the jti of each logged-out token until it would have expired
+    anyway, plus a per-user cutoff so that a password change or account
+    deletion revokes every token issued before it. Per process, like the
+    login rate limiter.
+    """
+
+    def __init__(self, max_age=ACCESS_TOKEN_EXPIRES):
+        self.max_age = max_age.total_seconds()
+        self._tokens = {}   # jti -> exp
+        self._users = {}    # sub -> tokens with an earlier iat are revoked
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        self._tokens = {jti: exp for jti, exp in self._tokens.items() if exp > now}
+        self._users = {sub: cutoff for sub, cutoff in self._users.items() if cutoff + self.max_age > now}
+
+    def revoke(self, claims):
+        now = time.time()
+        with self._lock:
+            self._tokens[claims["jti"]] = claims["exp"]
+            if len(self._tokens) % 1024 == 0:
+                self._prune(now)
+
+    def revoke_user(self, user_id):
+        with self._lock:
+            # Not truncated: tokens issued earlier in the same second (whole
+            # second iat) must fall before the cutoff too
+            self._users[str(user_id)] = time.time()
+            if len(self._users) % 1024 == 0:
+                self._prune(time.time())
+
+    def is_revoked(self, claims):
+        if claims.get("jti") in self._tokens:
+            return True
+        cutoff = self._users.get(str(claims.get("sub")))
+        return cutoff is not None and claims.get("iat", 0) < cutoff
+
+
+blocklist = Blocklist()
@@ -1,154 +1,94 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, current_app
 from flask_jwt_extended import jwt_required
-from bson import ObjectId
-from core.db import mongo
+from core import handlers
+from core.db import mongo, read_db
+from core.handlers import respond
+from core.importer import CHUNK_SIZE
+from core.streaming import wants_stream
+from core.stats import read_stats
 
 events_bp = Blueprint("events", __name__)
 
-# BASIC CRUD 
+# Route logic lives in core.handlers, shared with the ASGI app
+
+# BASIC CRUD
 
 # Get all events (with pagination + sorting)
+# Pass ?cursor= (empty for the first page) to use keyset pagination;
+# ?page= keeps the legacy skip/limit behaviour.
 @events_bp.route("/", methods=["GET"])
 def get_events():
-    page = int(request.args.get("page", 1))
-    limit = int(request.args.get("limit", 10))
-    sort_field = request.args.get("sort", "date")
-    skip = (page - 1) * limit
-
-    events = list(mongo.db.events.find().sort(sort_field, 1).skip(skip).limit(limit))
-    for e in events:
-        e["_id"] = str(e["_id"])
-    return jsonify(events), 200
+    return respond(handlers.get_events(read_db("events_read"), request.args))
 
 
 # Get a single event by ID
+# Conditional requests are answered from the cached event or a
+# version-only lookup, without loading and serializing the document.
 @events_bp.route("/<string:event_id>", methods=["GET"])
 def get_event(event_id):
-    try:
-        event = mongo.db.events.find_one({"_id": ObjectId(event_id)})
-        if not event:
-            return jsonify({"error": "Event not found"}), 404
-        event["_id"] = str(event["_id"])
-        return jsonify(event), 200
-    except Exception:
-        return jsonify({"error": "Invalid event ID"}), 400
+    return respond(handlers.get_event(mongo.db, event_id, request))
 
 
 # Create new event (Admin only)
 @events_bp.route("/", methods=["POST"])
 @jwt_required()
 def create_event():
-    data = request.get_json()
-    if not data or "name" not in data or "date" not in data:
-        return jsonify({"error": "Missing required fields"}), 400
-
-    event = {
-        "name": data["name"],
-        "description": data.get("description", ""),
-        "category": data.get("category", "General"),
-        "price": float(data.get("price", 0)),
-        "available_seats": int(data.get("available_seats", 100)),
-        "location": data.get("location", {}),
-        "date": data["date"],
-        "created_at": data.get("created_at", "")
-    }
-
-    result = mongo.db.events.insert_one(event)
-    return jsonify({
-        "message": "Event created successfully",
-        "event_id": str(result.inserted_id)
-    }), 201
+    return respond(handlers.create_event(mongo.db, request.get_json))
+
+
+# Bulk import/upsert events
+# Body: JSON array or NDJSON (streamed); rows with external_id are upserted
+@events_bp.route("/bulk", methods=["POST"])
+@jwt_required()
+def bulk_import_events():
+    return respond(handlers.bulk_import_events(mongo.db, request.args, lambda: request.stream.read(CHUNK_SIZE)))
 
 
 # Update an event
 @events_bp.route("/<string:event_id>", methods=["PUT"])
 @jwt_required()
 def update_event(event_id):
-    try:
-        data = request.get_json()
-        result = mongo.db.events.update_one(
-            {"_id": ObjectId(event_id)},
-            {"$set": data}
-        )
-        if result.matched_count == 0:
-            return jsonify({"error": "Event not found"}), 404
-        return jsonify({"message": "Event updated successfully"}), 200
-    except Exception:
-        return jsonify({"error": "Invalid event ID"}), 400
+    return respond(handlers.update_event(mongo.db, event_id, request.get_json))
 
 
 # Delete an event
 @events_bp.route("/<string:event_id>", methods=["DELETE"])
 @jwt_required()
 def delete_event(event_id):
-    try:
-        result = mongo.db.events.delete_one({"_id": ObjectId(event_id)})
-        if result.deleted_count == 0:
-            return jsonify({"error": "Event not found"}), 404
-        return jsonify({"message": "Event deleted successfully"}), 200
-    except Exception:
-        return jsonify({"error": "Invalid event ID"}), 400
+    return respond(handlers.delete_event(mongo.db, event_id))
 
 
 #ADVANCED QUERIES
 
 # Search events
+# q= runs a ranked text search over name/description/tags; category, city
+# and location match case-insensitive prefixes on indexed keyword fields
+# (mode=regex keeps the old unanchored substring match). ?stream=1 or
+# Accept: application/x-ndjson streams every match (or up to limit=).
 @events_bp.route("/search", methods=["GET"])
 def search_events():
-    query = {}
-    category = request.args.get("category")
-    city = request.args.get("city")
-    location = request.args.get("location")
-    max_price = request.args.get("max_price")
-
-    if category:
-        query["category"] = {"$regex": category, "$options": "i"}
-    if city:
-        query["city"] = {"$regex": city, "$options": "i"}
-    if location:
-        query["location.name"] = {"$regex": location, "$options": "i"}
-    if max_price:
-        query["price"] = {"$lte": float(max_price)}
-
-    events = list(mongo.db.events.find(query))
-    for e in events:
-        e["_id"] = str(e["_id"])
-    return jsonify(events), 200
+    return respond(handlers.search_events(read_db("events_read"), request.args, wants_stream(request)))
 
 
 # Nearby events
 @events_bp.route("/nearby", methods=["GET"])
 def nearby_events():
-    lat = request.args.get("lat")
-    lon = request.args.get("lon")
-    radius = float(request.args.get("radius", 10)) * 1000  # km → meters
-
-    if not lat or not lon:
-        return jsonify({"error": "Latitude and longitude required"}), 400
-
-    lat = float(lat)
-    lon = float(lon)
-
-    events = list(mongo.db.events.find({
-        "location": {
-            "$near": {
-                "$geometry": {"type": "Point", "coordinates": [lon, lat]},
-                "$maxDistance": radius
-            }
-        }
-    }))
-
-    for e in events:
-        e["_id"] = str(e["_id"])
-    return jsonify(events), 200
-
-# Aggregation: top categories
+    return respond(handlers.nearby_events(read_db("events_read"), request.args))
+
+
+def _summary(dimension):
+    return lambda: read_stats(mongo.db, dimension, logger=current_app.logger, reader=read_db("stats_read"))
+
+
+# Aggregation: top categories (served from the stats_category summary)
 @events_bp.route("/stats/categories", methods=["GET"])
 def category_stats():
-    stats = list(mongo.db.events.aggregate([
-        {"$group": {"_id": "$category", "total_events": {"$sum": 1}}},
-        {"$sort": {"total_events": -1}},
-        {"$limit": 3}
-    ]))
-    return jsonify(stats), 200
+    return respond(handlers.category_stats(_summary("category")))
+
 
+# Pre-aggregated stats by category, city, month, price_band or seats
+# (booked vs available). Rows are refreshed in the background once older
+# than STATS_MAX_AGE seconds.
+@events_bp.route("/stats/<string:dimension>", methods=["GET"])
+def dimension_stats(dimension):
+    return respond(handlers.dimension_stats(dimension, request.args, _summary(dimension)))
@@ -1,20 +1,23 @@
-import json, random, os
+import argparse, json, random, os
 from datetime import datetime
 from bson import ObjectId
-from pymongo import MongoClient
+from core.db_config import make_client
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 
-# Connect manually to MongoDB
-client = MongoClient(MONGO_URI)
+# Same pool/timeout/compression settings as the app (run from the repo
+# root: python -m seed.make_bookings)
+client = make_client(MONGO_URI)
 db = client["eventmate"]
 
 random.seed(20)
 
-def generate_bookings():
+BATCH_SIZE = 1000
+
+def generate_bookings(count=70):
     users = list(db.users.find({}, {"_id": 1}))
     events = list(db.events.find({}, {"_id": 1, "name": 1}))
 
@@ -23,8 +26,10 @@ def generate_bookings():
         return
 
     bookings = []
+    # The unique index on bookings allows one confirmed booking per user and event
+    confirmed = set()
 
-    for i in range(70):
+    for i in range(count):
         user = random.choice(users)
         event = random.choice(events)
 
@@ -36,13 +41,19 @@ def generate_bookings():
             "status": random.choice(["confirmed", "cancelled", "pending"]),
             "created_at": datetime.utcnow(),
         }
+        if booking["status"] == "confirmed":
+            pair = (booking["user_id"], booking["event_id"])
+            if pair in confirmed:
+                booking["status"] = "cancelled"
+            confirmed.add(pair)
 
         bookings.append(booking)
 
     # Insert directly into MongoDB
     db.bookings.delete_many({})  # optional: clear old test data
-    db.bookings.insert_many(bookings)
-    print("Inserted 70 bookings into MongoDB with valid ObjectIds.")
+    for start in range(0, len(bookings), BATCH_SIZE):
+        db.bookings.insert_many(bookings[start:start + BATCH_SIZE], ordered=False)
+    print(f"Inserted {count} bookings into MongoDB with valid ObjectIds.")
 
     # Also save a readable version locally
     exportable_bookings = [
@@ -65,4 +76,6 @@ def generate_bookings():
 
 
 if __name__ == "__main__":
-    generate_bookings()
+    parser = argparse.ArgumentParser(description="Generate sample bookings")
+    parser.add_argument("--count", type=int, default=70)
+    generate_bookings(parser.parse_args().count)
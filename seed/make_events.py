@@ -1,4 +1,4 @@
-import json, random, uuid
+import argparse, json, random, uuid
 from datetime import datetime, timedelta
 
 random.seed(7)
@@ -51,6 +51,7 @@ def make_event(n: int) -> dict:
     lon, lat = CITIES[city]
     category = random.choice(list(CATEGORIES.keys()))
     return {
+        "external_id": f"seed-{n}",          # stable key for re-imports
         "name": f"{category} Event {n}",      # ✅ Removed city name
         "city": city,                         # ✅ Added city field
         "category": category,
@@ -78,11 +79,27 @@ def make_event(n: int) -> dict:
         ]
     }
 
-# Generate 100 events
-events = [make_event(i + 1) for i in range(100)]
+def write_events(path, count, fmt):
+    """Stream events to disk one at a time so large counts stay flat on memory."""
+    with open(path, "w", encoding="utf-8") as f:
+        if fmt == "ndjson":
+            for i in range(count):
+                f.write(json.dumps(make_event(i + 1)) + "\n")
+            return
+        f.write("[\n")
+        for i in range(count):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(make_event(i + 1), indent=4))
+        f.write("\n]\n")
 
-# Save to JSON
-with open("events.json", "w", encoding="utf-8") as f:
-    json.dump(events, f, indent=4)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate sample events")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--format", choices=("json", "ndjson"), default="json")
+    parser.add_argument("--out", help="output file (default events.json / events.ndjson)")
+    args = parser.parse_args()
+    out = args.out or f"events.{args.format}"
 
-print("Created events.json with 100 events (with separate city field).")
+    write_events(out, args.count, args.format)
+    print(f"Created {out} with {args.count} events (with separate city field).")
@@ -1,4 +1,4 @@
-import json, random, uuid
+import argparse, json, random, uuid
 from datetime import datetime
 
 random.seed(10)
@@ -14,9 +14,16 @@ NAMES = [
     "Uma", "Vera", "Will", "Xena", "Yara"
 ]
 
+parser = argparse.ArgumentParser(description="Generate sample users")
+parser.add_argument("--count", type=int, default=25)
+count = parser.parse_args().count
+
 users = []
-for i, name in enumerate(NAMES[:25], start=1):
-    username = name.lower() + str(random.randint(100,999))
+for i in range(1, count + 1):
+    name = NAMES[(i - 1) % len(NAMES)]
+    # Past the name list, suffix with i so usernames stay unique
+    suffix = str(random.randint(100,999)) if i <= len(NAMES) else str(i)
+    username = name.lower() + suffix
     user = {
         "_id": object_id_like(i),
         "username": username,
@@ -30,4 +37,4 @@ for i, name in enumerate(NAMES[:25], start=1):
 with open("users.json", "w", encoding="utf-8") as f:
     json.dump(users, f, indent=4)
 
-print(" Created users.json with 25 users.")
+print(f" Created users.json with {count} users.")
@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from core.flow import Call, Many, run, run_async
+
+
+class Cursor(list):
+    async def to_list(self):
+        return list(self)
+
+
+def lookup(calls):
+    first = yield lambda: calls.append("find") or 1
+    try:
+        yield lambda: 1 / 0
+    except ZeroDivisionError:
+        calls.append("caught")
+    docs = yield Many(lambda: Cursor([first, 2]))
+    hashed = yield Call(lambda value: f"sync:{value}", async_hash, "pw")
+    return docs, hashed
+
+
+async def async_hash(value):
+    return f"async:{value}"
+
+
+def fails():
+    yield lambda: None
+    raise KeyError("boom")
+
+
+def test_run_sends_results_and_throws_errors_back():
+    calls = []
+    assert run(lookup(calls)) == ([1, 2], "sync:pw")
+    assert calls == ["find", "caught"]
+
+
+def test_run_async_awaits_results():
+    async def coro():
+        return 3
+
+    def steps():
+        value = yield coro
+        more = yield from lookup([])
+        return value, more
+
+    assert asyncio.run(run_async(steps())) == (3, ([1, 2], "async:pw"))
+
+
+@pytest.mark.parametrize("drive", [run, lambda steps: asyncio.run(run_async(steps))])
+def test_lists_return_exceptions_in_place(drive):
+    def steps():
+        return (yield [lookup([]), fails()])
+
+    ok, error = drive(steps())
+    assert ok[0] == [1, 2]
+    assert isinstance(error, KeyError)
+
+
+def test_uncaught_errors_propagate():
+    with pytest.raises(KeyError):
+        run(fails())
@@ -0,0 +1,43 @@
+import pytest
+from flask import Flask, jsonify, request
+from core.idempotency import HEADER, REPLAYED_HEADER, idempotent
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def client():
+    db = mongomock.MongoClient().db
+    app = Flask(__name__)
+    app.calls = 0
+
+    @app.route("/bookings", methods=["POST"])
+    @idempotent(lambda: db, lambda: "user-1")
+    def create():
+        app.calls += 1
+        return jsonify({"booking": app.calls, "tickets": request.get_json()["tickets"]}), 201
+
+    return app.test_client()
+
+
+def test_replayed_key_returns_stored_response(client):
+    first = client.post("/bookings", json={"tickets": 2}, headers={HEADER: "k1"})
+    again = client.post("/bookings", json={"tickets": 2}, headers={HEADER: "k1"})
+    assert first.status_code == again.status_code == 201
+    assert again.get_json() == first.get_json() == {"booking": 1, "tickets": 2}
+    assert REPLAYED_HEADER not in first.headers
+    assert again.headers[REPLAYED_HEADER] == "true"
+    assert client.application.calls == 1
+
+
+def test_key_reused_with_different_body_is_rejected(client):
+    client.post("/bookings", json={"tickets": 2}, headers={HEADER: "k1"})
+    other = client.post("/bookings", json={"tickets": 3}, headers={HEADER: "k1"})
+    assert other.status_code == 422
+    assert client.application.calls == 1
+
+
+def test_requests_without_a_key_always_run(client):
+    client.post("/bookings", json={"tickets": 2})
+    client.post("/bookings", json={"tickets": 2})
+    assert client.application.calls == 2
@@ -0,0 +1,61 @@
+import io
+import json
+import pytest
+from pymongo.results import BulkWriteResult
+from core.importer import MalformedInput, import_events, iter_records
+
+RECORDS = [
+    {"name": "A [b] {c}", "note": "quote \" and \\ backslash ]}"},
+    {"name": "Nested", "tags": [["x", "]"], {"y": "[{"}], "meta": {"a": {"b": [1, 2]}}},
+    {"name": "Unicode é☃", "escaped": "\\u005d"},
+]
+
+
+def parse(data, chunk_size):
+    return list(iter_records(io.BytesIO(data.encode()), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 65536])
+def test_json_array_across_chunk_boundaries(chunk_size):
+    assert parse(json.dumps(RECORDS, indent=2), chunk_size) == RECORDS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 65536])
+def test_ndjson_across_chunk_boundaries(chunk_size):
+    data = "\n".join(json.dumps(record, ensure_ascii=False) for record in RECORDS) + "\n"
+    assert parse(data, chunk_size) == RECORDS
+
+
+def test_text_streams_and_empty_input():
+    assert list(iter_records(io.StringIO(json.dumps(RECORDS)), chunk_size=4)) == RECORDS
+    assert parse("", 4) == []
+    assert parse("[]", 4) == []
+
+
+@pytest.mark.parametrize("data, line", [
+    ('[{"name": "a"},\n{"name": ', 2),
+    ('{"name": "a"}\n{"name": "b"}\n{"name": oops}\n', 3),
+    ('[{"name": "a"}, {"name": "b"}', 1),
+])
+def test_malformed_input_reports_line(data, line):
+    with pytest.raises(MalformedInput) as raised:
+        parse(data, 3)
+    assert raised.value.line == line
+
+
+class FakeCollection:
+    def __init__(self):
+        self.ops = []
+
+    def bulk_write(self, ops, ordered=False):
+        self.ops += ops
+        return BulkWriteResult({"nInserted": len(ops), "nUpserted": 0, "nMatched": 0, "nModified": 0}, True)
+
+
+def test_import_keeps_rows_read_before_malformed_input():
+    db = type("DB", (), {"events": FakeCollection()})()
+    data = '{"name": "a", "date": "2030-01-01"}\n{"name": "b", "date": "2030-01-02"}\n{"name": \n'
+    report = import_events(db, io.BytesIO(data.encode()), batch_size=1, chunk_size=8)
+    assert report["line"] == 3
+    assert "malformed" in report["error"]
+    assert len(db.events.ops) == report["rows"] == 2
@@ -0,0 +1,35 @@
+import pytest
+from core.queries import nearby_body, nearby_search
+
+mongomock = pytest.importorskip("mongomock")
+
+
+def run_nearby(collection, args):
+    """Run a nearby_search pipeline on mongomock, which has no $geoNear.
+
+    The stand-in matches every event (all sit at the query point, as seeded
+    events share their city's coordinates) and returns ties in descending
+    _id order, one of the arbitrary orders $geoNear may use.
+    """
+    nearby = nearby_search(args)
+    geo_near, *rest = nearby.pipeline
+    stand_in = [
+        {"$set": {"distance_km": 0.0}},
+        {"$match": {"distance_km": {"$gte": geo_near["$geoNear"].get("minDistance", 0) / 1000}}},
+        {"$sort": {"_id": -1}},
+    ]
+    return nearby_body(nearby, list(collection.aggregate(stand_in + rest)))
+
+
+def test_cursor_pages_cover_colocated_events_once():
+    events = mongomock.MongoClient().db.events
+    ids = events.insert_many([{"name": f"e{i}", "location": {"type": "Point", "coordinates": [13.4, 52.5]}}
+                              for i in range(23)]).inserted_ids
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = run_nearby(events, {"lat": "52.5", "lon": "13.4", "limit": "5", "cursor": cursor})
+        seen += [event["_id"] for event in page["events"]]
+        cursor = page["next_cursor"]
+
+    assert seen == sorted(ids)
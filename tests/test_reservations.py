@@ -0,0 +1,85 @@
+import pytest
+from core import reservations
+from core.flow import run
+from core.reservations import ReservationError, book_seats, change_status, remove_booking
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # mongomock has no sessions, so run the non-transactional path
+    monkeypatch.setattr(reservations, "BOOKING_TRANSACTIONS", "off")
+    return mongomock.MongoClient().db
+
+
+def seats(db, event_id):
+    return db.events.find_one({"_id": event_id})["available_seats"]
+
+
+def book(db, status="pending"):
+    """Book 2 of an event's 10 seats as pending, then move it to `status`."""
+    event_id = db.events.insert_one({"name": "Gig", "available_seats": 10}).inserted_id
+    booking = {"_id": run(book_seats(db, {"user_id": "u1", "event_id": event_id,
+                                          "ticket_count": 2, "status": "pending"}))}
+    if status != "pending":
+        run(change_status(db, booking, status))
+    return event_id, booking
+
+
+@pytest.mark.parametrize("current, status", [
+    ("pending", "confirmed"),
+    ("pending", "cancelled"),
+    ("confirmed", "cancelled"),
+    ("confirmed", "confirmed"),
+])
+def test_allowed_transitions(db, current, status):
+    _, booking = book(db, current)
+    assert run(change_status(db, booking, status))["status"] == status
+
+
+@pytest.mark.parametrize("current, status", [
+    ("confirmed", "pending"),
+    ("cancelled", "pending"),
+    ("cancelled", "confirmed"),
+])
+def test_rejected_transitions(db, current, status):
+    event_id, booking = book(db, current)
+    before = seats(db, event_id)
+    with pytest.raises(ReservationError) as raised:
+        run(change_status(db, booking, status))
+    assert raised.value.status == 409
+    assert db.bookings.find_one(booking)["status"] == current
+    assert seats(db, event_id) == before
+
+
+def test_unknown_status_is_rejected(db):
+    _, booking = book(db)
+    with pytest.raises(ReservationError) as raised:
+        run(change_status(db, booking, "refunded"))
+    assert raised.value.status == 400
+
+
+def test_cancelling_twice_releases_seats_once(db):
+    event_id, booking = book(db, "confirmed")
+    assert seats(db, event_id) == 8
+    run(change_status(db, booking, "cancelled"))
+    run(change_status(db, booking, "cancelled"))
+    assert seats(db, event_id) == 10
+
+
+def test_deleting_a_cancelled_booking_releases_nothing(db):
+    event_id, booking = book(db, "confirmed")
+    run(change_status(db, booking, "cancelled"))
+    run(remove_booking(db, booking))
+    assert seats(db, event_id) == 10
+    with pytest.raises(ReservationError) as raised:
+        run(remove_booking(db, booking))
+    assert raised.value.status == 404
+    assert seats(db, event_id) == 10
+
+
+def test_deleting_a_held_booking_releases_its_seats(db):
+    event_id, booking = book(db, "pending")
+    run(remove_booking(db, booking))
+    assert seats(db, event_id) == 10